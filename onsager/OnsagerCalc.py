@@ -936,7 +936,7 @@ class VacancyMediated(object):
                     failstate = 'thermodynamic range'
                 else:
                     failstate = 'escape endpoint'
-                if np.allclose(np.dot(PS.dx, PS.dx), np.dot(dxmap, dxmap), atol=self.threshold):
+                if np.allclose(PS.r2, np.dot(dxmap, dxmap), atol=self.threshold):
                     failtype = 'multiplicity issue'
                 else:
                     failtype = 'mapping error'
@@ -11,11 +11,18 @@ Class to store definition of a crystal, along with some analysis
 __author__ = 'Dallas R. Trinkle'
 
 import numpy as np
-import collections, copy, itertools
+import collections, copy, itertools, warnings
 from numbers import Number
 from math import gcd
 import yaml  # use crystal.yaml to call--may need to change in the future
 from functools import reduce
+from scipy.spatial import cKDTree
+
+# maptranslation switches from checking all pairs of sites to a k-d tree search above this many sites
+_KDTREE_MINSITES = 8
+
+# maximum number of passes over the BZ faces that fullkptmesh makes to fold k-points into the BZ
+_FOLDBZ_MAXPASSES = 8
 
 # YAML tags:
 # interfaces are either at the bottom, or staticmethods in the corresponding object
@@ -28,24 +35,81 @@ def gcdlist(lis):
     return reduce(gcd, lis)
 
 
-def incell(vec):
+def incell(vec, out=None):
     """
-    Returns the vector inside the unit cell (in [0,1)**3)
+    Returns the vector inside the unit cell (in [0,1)**3). Works elementwise, so vec
+    can also be an array of vectors.
 
     :param vec: 3-vector (unit coord)
+    :param out: (optional) array to store the result in; cannot share memory with vec
     :return: 3-vector
     """
-    return vec - np.floor(vec + 1.0e-8)
+    if out is None: return vec - np.floor(vec + 1.0e-8)
+    np.add(vec, 1.0e-8, out=out)
+    np.floor(out, out=out)
+    return np.subtract(vec, out, out=out)
 
 
-def inhalf(vec):
+def inhalf(vec, out=None):
     """
-    Returns the vector inside the centered cell (in [-0.5,0.5)**3)
+    Returns the vector inside the centered cell (in [-0.5,0.5)**3). Works elementwise, so vec
+    can also be an array of vectors.
 
     :param vec: 3-vector (unit coord)
+    :param out: (optional) array to store the result in; cannot share memory with vec
     :return: 3-vector
     """
-    return vec - np.floor(vec + 0.5)
+    if out is None: return vec - np.floor(vec + 0.5)
+    np.add(vec, 0.5, out=out)
+    np.floor(out, out=out)
+    return np.subtract(vec, out, out=out)
+
+
+def _det(M):
+    """
+    Determinant of a 2x2 or 3x3 matrix by cofactor expansion, avoiding the LAPACK overhead
+    for such small matrices. Integer matrices give exact integer determinants. Works on
+    stacks of matrices too (array[..., dim, dim]).
+
+    :param M: array[2,2] or array[3,3]
+    :return det: determinant
+    """
+    if M.shape[-1] == 2: return M[..., 0, 0] * M[..., 1, 1] - M[..., 0, 1] * M[..., 1, 0]
+    return M[..., 0, 0] * (M[..., 1, 1] * M[..., 2, 2] - M[..., 1, 2] * M[..., 2, 1]) \
+           - M[..., 0, 1] * (M[..., 1, 0] * M[..., 2, 2] - M[..., 1, 2] * M[..., 2, 0]) \
+           + M[..., 0, 2] * (M[..., 1, 0] * M[..., 2, 1] - M[..., 1, 1] * M[..., 2, 0])
+
+
+def _adj(M):
+    """
+    Adjugate (transposed cofactor matrix) of a 2x2 or 3x3 matrix, so that M.adj(M) = det(M) I.
+    Integer matrices give exact integer adjugates.
+
+    :param M: array[2,2] or array[3,3]
+    :return adj: array[2,2] or array[3,3]
+    """
+    if M.shape == (2, 2):
+        return np.array([[M[1, 1], -M[0, 1]],
+                         [-M[1, 0], M[0, 0]]])
+    return np.array([[M[1, 1] * M[2, 2] - M[1, 2] * M[2, 1],
+                      M[0, 2] * M[2, 1] - M[0, 1] * M[2, 2],
+                      M[0, 1] * M[1, 2] - M[0, 2] * M[1, 1]],
+                     [M[1, 2] * M[2, 0] - M[1, 0] * M[2, 2],
+                      M[0, 0] * M[2, 2] - M[0, 2] * M[2, 0],
+                      M[0, 2] * M[1, 0] - M[0, 0] * M[1, 2]],
+                     [M[1, 0] * M[2, 1] - M[1, 1] * M[2, 0],
+                      M[0, 1] * M[2, 0] - M[0, 0] * M[2, 1],
+                      M[0, 0] * M[1, 1] - M[0, 1] * M[1, 0]]])
+
+
+def _inv(M):
+    """
+    Inverse of a 2x2 or 3x3 matrix from the adjugate and determinant.
+
+    :param M: array[2,2] or array[3,3]
+    :return invM: array[2,2] or array[3,3]
+    """
+    return _adj(M) / _det(M)
 
 
 def maptranslation(oldpos, newpos, oldspins=None, newspins=None, threshold=1e-8):
@@ -86,11 +150,6 @@ def maptranslation(oldpos, newpos, oldspins=None, newspins=None, threshold=1e-8)
                 if type(a) is not list: raise TypeError("element of oldspins {} is not a list".format(a))
                 if type(b) is not list: raise TypeError("element of newspins {} is not a list".format(b))
                 if len(a) != len(b): raise IndexError("{} and {} do not have the same length".format(a, b))
-    if oldspins is None:
-        oldspins = [[0 for u in atomlist] for atomlist in oldpos]
-    if newspins is None:
-        newspins = oldspins
-
     # Work with the shortest possible list for identifying translations
     atomindex = 0
     maxlen = len(oldpos[atomindex])
@@ -98,31 +157,53 @@ def maptranslation(oldpos, newpos, oldspins=None, newspins=None, threshold=1e-8)
         if len(ulist) < maxlen:
             maxlen = len(ulist)
             atomindex = i
+    # stack each list of positions into an array, so that the matching can be done by broadcasting
+    oldarr = [np.array(atomlist) for atomlist in oldpos]
+    newarr = [np.array(atomlist) for atomlist in newpos]
+    # spin matching doesn't depend on the translation, so we only need to do it once:
+    # spinmatch[c][j, k] is True if old atom j and new atom k have the same spin
+    if oldspins is None:
+        spinmatch = [None for atomlist in oldpos]
+    else:
+        spinmatch = []
+        for spinlist0, spinlist1 in zip(oldspins, newspins):
+            s0, s1 = np.array(spinlist0), np.array(spinlist1)
+            close = np.isclose(s0[:, None, ...], s1[None, :, ...], atol=threshold)
+            spinmatch.append(close.all(axis=tuple(range(2, close.ndim))))
+    # for large sets of sites (without spins), we search a k-d tree of the old positions and their
+    # periodic images, with the max-norm, instead of checking every pair of sites
+    trees = [cKDTree(np.concatenate([incell(atomarr0) + shift
+                                     for shift in itertools.product((-1, 0, 1), repeat=atomarr0.shape[1])]))
+             if spins is None and len(atomarr0) > _KDTREE_MINSITES else None
+             for atomarr0, spins in zip(oldarr, spinmatch)]
+    # displacements between all old and new positions don't depend on the translation either;
+    # we also allocate our work arrays once, and reuse them for each trial translation
+    displacements = [atomarr0[:, None, :] - atomarr1[None, :, :] if tree is None else None
+                     for atomarr0, atomarr1, tree in zip(oldarr, newarr, trees)]
+    shifted = [np.empty(du.shape) if du is not None else None for du in displacements]
+    work = [np.empty(du.shape) if du is not None else None for du in displacements]
     ru0 = newpos[atomindex][0]
-    for ub in oldpos[atomindex]:
+    for ub in oldarr[atomindex]:
         trans = inhalf(ub - ru0)
-        foundmap = True
         # now check against all the others, and construct the mapping
         indexmap = []
-        for atomlist0, spinlist0, atomlist1, spinlist1 in zip(oldpos, oldspins, newpos, newspins):
-            # work through the "new" positions
-            if not foundmap: break
-            maplist = []
-            for rua, sp1 in zip(atomlist1, spinlist1):
-                for j, uj, sp0 in zip(itertools.count(), atomlist0, spinlist0):
-                    if not np.allclose(sp0, sp1, atol=threshold): continue  # only allow maps that have same spin
-                    if np.allclose(inhalf(uj - rua - trans), 0, atol=threshold):
-                        maplist.append(j)
-                        break
-            if len(maplist) != len(atomlist0):
-                foundmap = False
-            else:
-                indexmap.append(tuple(maplist))
-        if foundmap: break
-    if foundmap:
-        return trans, tuple(indexmap)
-    else:
-        return None, None
+        for atomarr1, tree, du, dushift, dwork, spins in zip(newarr, trees, displacements, shifted, work, spinmatch):
+            if tree is not None:
+                # nearest periodic image of an old position to each translated new position
+                dist, index = tree.query(incell(atomarr1 + trans), p=np.inf, distance_upper_bound=2 * threshold)
+                if not np.all(dist <= threshold): break
+                indexmap.append(tuple((index % len(atomarr1)).tolist()))
+                continue
+            # matches[j, k] is True if old position j == new position k + trans
+            np.subtract(du, trans, out=dushift)
+            matches = np.all(np.abs(inhalf(dushift, out=dwork), out=dwork) <= threshold, axis=-1)
+            if spins is not None: matches &= spins  # only allow maps that have same spin
+            if not np.all(np.any(matches, axis=0)): break
+            # argmax returns the first match for each new position
+            indexmap.append(tuple(np.argmax(matches, axis=0).tolist()))
+        else:
+            return trans, tuple(indexmap)
+    return None, None
 
 
 class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
@@ -192,16 +273,20 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
         ### that __eq__ uses "isclose" on our translations, and we don't have a good way to handle
         ### that in a hash function. We lose a little bit on efficiency if we construct a set that
         ### has a whole lot of translation operations, but that's not usually what we will do.
-        # return hash(self.rot.data.tobytes())
-        return hash(self.rot.data.tobytes()) ^ hash(self.indexmap)
+        ### The hash is computed once, and stored with the (immutable) group operation; the rotation
+        ### is hashed as a tuple of integers, which avoids a byte copy of the array on every call.
+        gophash = self.__dict__.get('_hash')
+        if gophash is None:
+            gophash = hash(tuple(self.rot.ravel().tolist())) ^ hash(self.indexmap)
+            self.__dict__['_hash'] = gophash
+        return gophash
 
     def __add__(self, other):
         """Add a translation to our group operation"""
-        if __debug__:
-            if type(other) is not np.ndarray: raise TypeError('Can only add a translation to a group operation')
-            if other.shape != (self.rot.shape[0],):
-                raise IndexError('Can only add a {} dimensional vector'.format(self.rot.shape[0]))
-            if not np.issubdtype(other.dtype, np.integer): raise TypeError('Can only add a lattice vector translation')
+        if not isinstance(other, np.ndarray): raise TypeError('Can only add a translation to a group operation')
+        assert other.shape == (self.rot.shape[0],), \
+            'Can only add a {} dimensional vector'.format(self.rot.shape[0])
+        assert np.issubdtype(other.dtype, np.integer), 'Can only add a lattice vector translation'
         return GroupOp(self.rot, self.trans + other, self.cartrot, self.indexmap)
 
     def __sub__(self, other):
@@ -210,21 +295,38 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
 
     def __mul__(self, other):
         """Multiply two group operations to produce a new group operation"""
-        if __debug__:
-            if type(other) is not GroupOp: return NotImplemented
-        return GroupOp(np.dot(self.rot, other.rot),
-                       np.dot(self.rot, other.trans) + self.trans,
-                       np.dot(self.cartrot, other.cartrot),
-                       tuple(tuple(atomlist0[i] for i in atomlist1)
-                             for atomlist0, atomlist1 in zip(self.indexmap, other.indexmap)))
+        # not a debug check: returning NotImplemented lets other types (e.g., Supercell) define __rmul__
+        if not isinstance(other, GroupOp): return NotImplemented
+        # compose the index maps with integer array indexing
+        indexarray = tuple(_readonly(atomarray0[atomarray1])
+                           for atomarray0, atomarray1 in zip(self.indexmaparray(), other.indexmaparray()))
+        gop = GroupOp(self.rot @ other.rot,
+                      self.rot @ other.trans + self.trans,
+                      self.cartrot @ other.cartrot,
+                      tuple(tuple(atomarray.tolist()) for atomarray in indexarray))
+        gop.__dict__['_indexmaparray'] = indexarray
+        return gop
+
+    def indexmaparray(self):
+        """
+        Returns the indexmap as a tuple of integer arrays; the arrays are constructed on the first call,
+        and then stored with the (immutable) group operation. They are shared, so they are read-only.
+
+        :return indexarray: tuple of (read-only) integer arrays, one for each chemistry
+        """
+        indexarray = self.__dict__.get('_indexmaparray')
+        if indexarray is None:
+            indexarray = tuple(_readonly(np.array(atomlist, dtype=int)) for atomlist in self.indexmap)
+            self.__dict__['_indexmaparray'] = indexarray
+        return indexarray
 
     def __sane__(self):
         """Return true if the cartrot and rot are consistent and 'sane'"""
-        tr = self.rot.trace()
-        det = np.int(np.round(np.linalg.det(self.rot)))
+        tr = int(self.rot.trace())
+        det = int(round(float(_det(self.rot))))
         # consistency:
-        if np.int(np.round(self.cartrot.trace())) != tr: return False
-        if np.int(np.round(np.linalg.det(self.cartrot))) != det: return False
+        if int(round(float(self.cartrot.trace()))) != tr: return False
+        if int(round(float(_det(self.cartrot)))) != det: return False
         # sanity:
         if abs(det) != 1: return False
         dimshift = 0 if self.rot.shape[0] == 3 else -1
@@ -232,13 +334,20 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
         return True
 
     def inv(self):
-        """Construct and return the inverse of the group operation"""
-        inverse = (np.round(np.linalg.inv(self.rot))).astype(int)
-        return GroupOp(inverse,
-                       -np.dot(inverse, self.trans),
-                       self.cartrot.T,
-                       tuple(tuple(x for i, x in sorted([(y, j) for j, y in enumerate(atomlist)]))
-                             for atomlist in self.indexmap))
+        """Construct and return the inverse of the group operation; stored after the first call"""
+        gopinv = self.__dict__.get('_inv')
+        if gopinv is None:
+            inverse = (np.round(_inv(self.rot))).astype(int)
+            # each indexmap is a permutation, so its inverse is given by argsort
+            indexarray = tuple(_readonly(np.argsort(atomarray, kind='stable')) for atomarray in self.indexmaparray())
+            gopinv = GroupOp(inverse,
+                             -np.dot(inverse, self.trans),
+                             self.cartrot.T,
+                             tuple(tuple(atomarray.tolist()) for atomarray in indexarray))
+            gopinv.__dict__['_indexmaparray'] = indexarray
+            gopinv.__dict__['_inv'] = self
+            self.__dict__['_inv'] = gopinv
+        return gopinv
 
     @staticmethod
     def optype(rot):
@@ -253,8 +362,8 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
         """
         # dim = rot.shape[0]
         dimindexpos, dimindexneg = (1, 3) if rot.shape[0] == 3 else (2, 4)
-        tr = np.int(rot.trace())
-        if np.linalg.det(rot) > 0:
+        tr = int(rot.trace())
+        if _det(rot) > 0:
             return (2, 3, 4, 6, 1)[tr + dimindexpos]  # trace determines the rotation type [tr + 1] for 3d
         else:
             return (-2, -3, -4, -6, -1)[tr + dimindexneg]  # trace determines the rotation type [tr + 3] fpr 3d
@@ -279,7 +388,6 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
                 raise ValueError('Bad GroupOp:\n{}'.format(self))
         optype = self.optype(self.rot)
         det = 1 if optype > 0 else -1
-        tr = np.int(self.rot.trace())
         # two trivial cases: identity, inversion:
         if optype == 1 or optype == -2:
             return optype, np.eye(self.rot.shape[0])
@@ -289,21 +397,13 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
             # only interesting case is how to deal with is the mirror plane; find the angle of the mirror
             phi = 0.5*np.arctan2(self.cartrot[0,1]+self.cartrot[1,0], self.cartrot[0,0]-self.cartrot[1,1])
             return optype, np.array([[np.cos(phi), -np.sin(phi)], [np.sin(phi), np.cos(phi)]])
-        # otherwise, there's an axis to find:
-        vmat = np.eye(3)
-        vsum = np.zeros((3, 3))
-        if det > 0:
-            for n in range(optype):
-                vsum += vmat
-                vmat = np.dot(self.cartrot, vmat)
-        else:
-            for n in range((0, 6, 4, 3, 2)[tr + 3]):  #
-                vsum += vmat
-                vmat = -np.dot(self.cartrot, vmat)
-        # vmat *should* equal identity if we didn't fail...
-        if __debug__:
-            if not np.allclose(vmat, np.eye(3)): raise ArithmeticError('eigenvalue analysis fail')
-        vsum *= 1. / n
+        # otherwise, there's an axis to find: the average over the cyclic group of the proper
+        # rotation Rp (= cartrot, or -cartrot for an improper operation) is the projector onto
+        # the axis, e e^T; as Rp = cos(t) I + sin(t) [e]x + (1-cos(t)) e e^T, the projector has the
+        # closed form (Rp + Rp^T - (tr Rp - 1) I) / (3 - tr Rp), valid for any Rp != I
+        Rp = self.cartrot if det > 0 else -self.cartrot
+        trp = Rp[0, 0] + Rp[1, 1] + Rp[2, 2]
+        vsum = (Rp + Rp.T - (trp - 1.) * np.eye(3)) / (3. - trp)
         # now the columns of vsum should either be (a) our rotation / mirror axis, or (b) zero
         eig0 = vsum[:, 0]
         magn0 = np.dot(eig0, eig0)
@@ -342,6 +442,29 @@ class GroupOp(collections.namedtuple('GroupOp', 'rot trans cartrot indexmap')):
         return GroupOp(**loader.construct_mapping(node, deep=True))
 
 
+def _readonly(a):
+    """Mark an array as read-only (so that it can be safely shared), and return it"""
+    a.setflags(write=False)
+    return a
+
+
+# shared constants for the edge cases of VectorBasis and SymmTensorBasis; these are read-only,
+# so that the same arrays can be returned from every call without allocation.
+_ZEROVECT = {2: _readonly(np.zeros(2)), 3: _readonly(np.zeros(3))}
+_SYMMTENSORFULL = {2: tuple(_readonly(t) for t in
+                            (np.array([[1., 0.], [0., 0.]]),  # xx
+                             np.array([[0., 0.], [0., 1.]]),  # yy
+                             np.array([[0., 1.], [1., 0.]]) / np.sqrt(2))),  # xy
+                   3: tuple(_readonly(t) for t in
+                            (np.array([[1., 0., 0.], [0., 0., 0.], [0., 0., 0.]]),  # xx
+                             np.array([[0., 0., 0.], [0., 1., 0.], [0., 0., 0.]]),  # yy
+                             np.array([[0., 0., 0.], [0., 0., 0.], [0., 0., 1.]]),  # zz
+                             np.array([[0., 0., 0.], [0., 0., 1.], [0., 1., 0.]]) / np.sqrt(2),  # yz
+                             np.array([[0., 0., 1.], [0., 0., 0.], [1., 0., 0.]]) / np.sqrt(2),  # zx
+                             np.array([[0., 1., 0.], [1., 0., 0.], [0., 0., 0.]]) / np.sqrt(2)))}  # xy
+_SYMMTENSORISO2 = _readonly(np.eye(2) / np.sqrt(2))
+
+
 def VectorBasis(rottype, eigenvect):
     """
     Returns a vector basis corresponding to the optype and eigenvectors for a GroupOp
@@ -349,16 +472,17 @@ def VectorBasis(rottype, eigenvect):
     :param rottype: output from eigen()
     :param eigenvect: eigenvectors
     :return dim: dimensionality, 0..3
-    :return vect: vector defining line direction (1) or plane normal (2)
+    :return vect: vector defining line direction (1) or plane normal (2); the zero vector
+      for the sphere and point cases is a shared, read-only array
     """
     # 2d first
     if len(eigenvect) == 2:
-        if rottype == 1: return (2, np.zeros(2))  # sphere (identity)
+        if rottype == 1: return (2, _ZEROVECT[2])  # sphere (identity)
         if rottype == -1: return (1, eigenvect[0])  # plane (pure mirror)
-        return (0, np.zeros(2))  # all others are rotation, which leaves nothing unchanged in 2d
+        return (0, _ZEROVECT[2])  # all others are rotation, which leaves nothing unchanged in 2d
     # edge cases first:
-    if rottype == 1: return (3, np.zeros(3))  # sphere (identity)
-    if rottype == -2: return (0, np.zeros(3))  # point (inversion)
+    if rottype == 1: return (3, _ZEROVECT[3])  # sphere (identity)
+    if rottype == -2: return (0, _ZEROVECT[3])  # point (inversion)
     if rottype == -1: return (2, eigenvect[0])  # plane (pure mirror)
     return (1, eigenvect[0])  # line (all others--there's a rotation axis involved
 
@@ -370,7 +494,8 @@ def SymmTensorBasis(rottype, eigenvect):
 
     :param rottype: output from eigen()
     :param eigenvect: eigenvectors
-    :return tensorbasis: list of 2nd-rank symmetric tensors making up the basis
+    :return tensorbasis: list of 2nd-rank symmetric tensors making up the basis; tensors that
+      do not depend on the eigenvectors are shared, read-only arrays
     """
 
     def SymmTensor1(v1):
@@ -388,21 +513,15 @@ def SymmTensorBasis(rottype, eigenvect):
     # 2d first:
     if len(eigenvect) == 2:
         if rottype == 1 or rottype == -2:
-            return [SymmTensor1(np.array([1.,0.])), SymmTensor1(np.array([0.,1.])),
-                    SymmTensorCross(np.array([1.,0]), np.array([0.,1.]))]
+            return list(_SYMMTENSORFULL[2])
         if rottype == -1:
             return [SymmTensor1(eigenvect[0]), SymmTensor1(eigenvect[1])]
         # rotations kill everything except the isotropic case:
-        return [SymmTensor2(np.array([1.,0.]), np.array([0.,1.]))]
+        return [_SYMMTENSORISO2]
 
     if rottype == 1 or rottype == -2:
-        # identity / inversion: all symmetric tensors
-        return [SymmTensor1(np.array([1., 0., 0.])),  # xx
-                SymmTensor1(np.array([0., 1., 0.])),  # yy
-                SymmTensor1(np.array([0., 0., 1.])),  # zz
-                SymmTensorCross(np.array([0., 1., 0.]), np.array([0., 0., 1.])),  # yz
-                SymmTensorCross(np.array([1., 0., 0.]), np.array([0., 0., 1.])),  # zx
-                SymmTensorCross(np.array([1., 0., 0.]), np.array([0., 1., 0.]))]  # xy
+        # identity / inversion: all symmetric tensors (xx, yy, zz, yz, zx, xy)
+        return list(_SYMMTENSORFULL[3])
     if rottype == -1 or rottype == 2:
         # mirror plane or 2-fold rotation:
         # 4 symmetric tensors: e0 x e0, e1 x e1, e2 x e2, e1 x e2
@@ -474,15 +593,15 @@ def CombineTensorBasis(b1, b2, symmetric=True):
     if len(b2) == b2[0].size: return b1
     # make the combined matrix with the two column spaces D = [b1 b2], then
     # find its nullspace
-    u, s, vh = np.linalg.svd(np.array([v.flatten() for v in b1] + [v.flatten() for v in b2]).T)
+    b1array = np.array(b1)
+    u, s, vh = np.linalg.svd(np.concatenate((b1array, np.array(b2))).reshape(len(b1) + len(b2), -1).T)
     # this is sneaky: the first is to pull out the size of the nullspace, the second slices
     # the part of b1 that we have to deal with, but then we have to *renormalize* these vectors
     # by multiplying by sqrt(2), since the slice in each vector space would be normalized.
     nullspace = vh[sum(s >= 1e-8):, 0:len(b1)] * np.sqrt(2)
-    # now to reconstruct our normalized basis from those
-    # list comprehension to run over the elements of our nullspace, and the
-    # generator in the sum to construct the basis
-    return [sum(b1[i] * alpha for i, alpha in enumerate(v)) for v in nullspace]
+    # now to reconstruct our normalized basis from those: contract the nullspace
+    # coefficients with the b1 tensors
+    return list(np.tensordot(nullspace, b1array, axes=1))
 
 
 def ProjectTensorBasis(tensor, basis):
@@ -490,12 +609,15 @@ def ProjectTensorBasis(tensor, basis):
     Given a tensor, project it onto the basis.
 
     :param tensor: tensor
-    :param basis: list consisting of an orthonormal basis
+    :param basis: list consisting of an orthonormal basis; can also be given as a single array
+        of the basis stacked along the first index, to avoid restacking for repeated projections
     :return tensor: tensor, projected
     """
+    basisarray = np.asarray(basis)
     if __debug__:
-        if tensor.shape != basis[0].shape: raise TypeError("Tensor and basis not compatible")
-    return sum(b * np.sum(tensor * b) for b in basis)
+        if tensor.shape != basisarray.shape[1:]: raise TypeError("Tensor and basis not compatible")
+    # coefficients of the tensor in our basis, followed by the expansion in the basis
+    return np.tensordot(np.tensordot(basisarray, tensor, axes=tensor.ndim), basisarray, axes=1)
 
 
 def Voigtstrain(e1, e2, e3, e4, e5, e6):
@@ -548,6 +670,12 @@ def FourthRankIsotropic(F):
     return average, shear
 
 
+# cache of the symmetry analysis (BZG, G, pointG, Wyckoff) of recently constructed crystals,
+# keyed by Crystal._symmetrykey(); least recently used entries are discarded first
+_SYMMETRYCACHE = collections.OrderedDict()
+_SYMMETRYCACHE_SIZE = 64
+
+
 # TODO: Add the ability to explicitly specify "metastable" states
 # that should be considered the same chemistry, but not subject to reduction
 class Crystal(object):
@@ -574,7 +702,7 @@ class Crystal(object):
         :param basis: list of array[3] or list of list of array[3] (or 2 if 2-dimensional)
             crystalline basis vectors, in unit cell coordinates. If a list of lists, then
             there are multiple chemical elements, with each list corresponding to a unique
-            element
+            element. Each list of vectors can also be given as a single array[N,3]
         :param chemistry: (optional) list of names of chemical elements
         :param spins: (optional) list of numbers (complex) / vectors or list of list of same
             spins for individual atoms; if not None, needs to match the basis. Can either be
@@ -595,17 +723,23 @@ class Crystal(object):
         if self.lattice.shape != (3, 3) and self.lattice.shape != (2, 2):
             raise TypeError('lattice contains vectors that are not 2 or 3 dimensional')
         self.dim = self.lattice.shape[0] # dimensionality of our lattice
+        if type(basis) is np.ndarray:
+            if basis.ndim != 2: raise TypeError('basis array needs to be two dimensional')
+            basis = [basis]
         if type(basis) is not list: raise TypeError('basis needs to be a list or list of lists')
-        if type(basis[0]) == np.ndarray:
+        if type(basis[0]) == np.ndarray and basis[0].ndim == 1:
             for u in basis:
                 if type(u) is not np.ndarray: raise TypeError("{} in {} is not an array".format(u, basis))
-            self.basis = [[incell(u) for u in basis]]
+            self.basis = [list(incell(np.array(basis)))]
         else:
             for elem in basis:
+                if type(elem) is np.ndarray:
+                    if elem.ndim != 2: raise TypeError("{} in basis is not a two dimensional array".format(elem))
+                    continue
                 if type(elem) is not list: raise TypeError("{} in basis is not a list".format(elem))
                 for u in elem:
                     if type(u) is not np.ndarray: raise TypeError("{} in {} is not an array".format(u, elem))
-            self.basis = [[incell(u) for u in atombasis] for atombasis in basis]
+            self.basis = [list(incell(np.array(atombasis))) for atombasis in basis]
         if spins is not None:
             if type(spins) is not list: raise TypeError('spins needs to be a list or list of lists')
             if type(spins[0]) is list:
@@ -617,7 +751,7 @@ class Crystal(object):
         self.threshold = threshold
         if not noreduce: self.reduce()  # clean up basis as needed
         self.minlattice()  # clean up lattice vectors as needed
-        self.invlatt = np.linalg.inv(self.lattice)
+        self._latticesetup()  # inverse, metric, volume, reciprocal lattice
         # this lets us, in a flat list, enumerate over indices of atoms as needed
         self.atomindices = [(atomtype, atomindex)
                             for atomtype, atomlist in enumerate(self.basis)
@@ -628,17 +762,50 @@ class Crystal(object):
             self.chemistry = ['{}'.format(i) for i in range(self.Nchem)]
         else:
             self.chemistry = chemistry.copy()
-        self.volume, self.metric = self.calcmetric()
-        self.reciplatt = 2. * np.pi * self.invlatt.T
-        self.BZvol = abs(float(np.linalg.det(self.reciplatt)))
-        self.BZG = self.genBZG()
         self.center()  # should do before gengroup so that inversion is centered at origin
-        if NOSYM:
-            self.G = frozenset([GroupOp.ident(self.basis)])
+        # the symmetry analysis only depends on the (final) lattice and basis, so reuse
+        # the results if we have seen this crystal before
+        symmkey = self._symmetrykey(NOSYM)
+        symmetry = _SYMMETRYCACHE.get(symmkey) if symmkey is not None else None
+        if symmetry is None:
+            self.BZG = self.genBZG()
+            if NOSYM:
+                self.G = frozenset([GroupOp.ident(self.basis)])
+            else:
+                self.G = self.gengroup()  # do before genpoint
+            self.pointG = self.genpoint()
+            self.Wyckoff = self.genWyckoffsets()
+            if symmkey is not None:
+                _SYMMETRYCACHE[symmkey] = (self.BZG.copy(), self.G, self.pointG, self.Wyckoff)
+                if len(_SYMMETRYCACHE) > _SYMMETRYCACHE_SIZE: _SYMMETRYCACHE.popitem(last=False)
         else:
-            self.G = self.gengroup()  # do before genpoint
-        self.pointG = self.genpoint()
-        self.Wyckoff = self.genWyckoffsets()
+            _SYMMETRYCACHE.move_to_end(symmkey)
+            BZG, self.G, pointG, self.Wyckoff = symmetry
+            # G and Wyckoff are immutable; copy the array and the nested lists
+            self.BZG = BZG.copy()
+            self.pointG = [[Gpoint for Gpoint in Glist] for Glist in pointG]
+
+    def _symmetrykey(self, NOSYM=False):
+        """
+        Key for the symmetry cache: the lattice and basis, as bytes, with the threshold.
+        Crystals with spins are not cached.
+
+        :param NOSYM: whether symmetry analysis is turned off
+        :return key: hashable key, or None if the crystal should not be cached
+        """
+        if self.spins is not None: return None
+        return (self.lattice.shape, np.asarray(self.lattice, dtype=float).tobytes(),
+                tuple(np.array(atomlist, dtype=float).tobytes() for atomlist in self.basis),
+                tuple(len(atomlist) for atomlist in self.basis),
+                self.threshold, NOSYM)
+
+    # derived arrays cached on first use (see BZG2, basisarrays, _Garrays, _Glatticeshift, Wyckoffmap);
+    # these are left out of the saved state (YAML, pickle, deepcopy), and rebuilt when needed
+    __cacheattr__ = ('_BZG2cache', '_basiscache', '_Garraycache', '_Glatticeshiftcache', '_Wyckoffmapcache')
+
+    def __getstate__(self):
+        """State to save: everything but the cached derived arrays"""
+        return {attr: value for attr, value in self.__dict__.items() if attr not in self.__cacheattr__}
 
     def __repr__(self):
         """String representation of crystal (lattice + basis)"""
@@ -771,19 +938,17 @@ class Crystal(object):
         if indexmap is None:
             return
         # translate by -1/2 * trans for inversion
-        self.basis = [[incell(u - 0.5 * trans) for u in atomlist] for atomlist in self.basis]
+        self.basis = [list(incell(np.array(atomlist) - 0.5 * trans)) for atomlist in self.basis]
         # now, check for "aesthetics" of our basis choice
-        shift = np.zeros(self.dim)
-        for d in range(self.dim):
-            if np.any([np.isclose(u[d], 0, atol=self.threshold)
-                       for atomlist in self.basis for u in atomlist]):
-                shift[d] = 0
-            elif np.any([np.isclose(u[d], 0.5, atol=self.threshold)
-                         for atomlist in self.basis for u in atomlist]):
-                shift[d] = 0.5
-            elif sum([1 for atomlist in self.basis for u in atomlist if u[d] < 0.25 or u[d] > 0.75]) > self.N / 2:
-                shift[d] = 0.5
-        self.basis = [[incell(atom + shift) for atom in atomlist] for atomlist in self.basis]
+        # stack all of the sites so that each test is a single reduction along the atom axis:
+        # prefer a shift of 0 if any site sits on 0, then 0.5 if any site sits on 0.5, and
+        # finally 0.5 if the majority of the sites are near the cell boundary
+        flat = np.concatenate([np.reshape(atomlist, (-1, self.dim)) for atomlist in self.basis])
+        near0 = np.isclose(flat, 0, atol=self.threshold).any(axis=0)
+        nearhalf = np.isclose(flat, 0.5, atol=self.threshold).any(axis=0)
+        corner = ((flat < 0.25) | (flat > 0.75)).sum(axis=0) > self.N / 2
+        shift = np.where(near0, 0., np.where(nearhalf | corner, 0.5, 0.))
+        self.basis = [list(incell(np.array(atomlist) + shift)) for atomlist in self.basis]
 
     def reduce(self, threshold=None):
         """
@@ -817,6 +982,14 @@ class Crystal(object):
         else:
             spins = self.spins
         # We need to first check against reducibility of atomic positions: try out non-trivial displacements
+        # stack positions for each chemistry, and determine which pairs of sites have the same spin
+        # (samespin[c][i, j]), so that each trial translation is checked by broadcasting:
+        atomarrays = [np.array(atomlist) for atomlist in self.basis]
+        samespin = []
+        for spinlist in spins:
+            sp = np.array(spinlist)
+            samespin.append(np.isclose(sp[:, None, ...], sp[None, :, ...],
+                                       atol=self.threshold).reshape(len(sp), len(sp), -1).all(axis=-1))
         initpos, initsp = self.basis[atomindex][0], spins[atomindex][0]
         trans = False
         for newpos, newsp in zip(self.basis[atomindex], spins[atomindex]):
@@ -828,14 +1001,14 @@ class Crystal(object):
             if not self.__isclose__(t, T/M): continue
             t = T/M
             trans = True
-            for atomlist, spinlist in zip(self.basis, spins):
-                for u, s in zip(atomlist, spinlist):
-                    # edited to only check against translations with the same spin:
-                    if np.all([not self.__iszero__(inhalf(u + t - v))
-                               for v, vs in zip(atomlist, spinlist)
-                               if self.__isclose__(s, vs)]):
-                        trans = False
-                        break
+            for atomarray, spinmatch in zip(atomarrays, samespin):
+                # matches[i, j] is True if u_i + t == u_j; edited to only check against translations
+                # with the same spin:
+                matches = np.all(np.abs(inhalf(atomarray[:, None, :] + t - atomarray[None, :, :])) <= self.threshold,
+                                 axis=-1) & spinmatch
+                if not np.all(np.any(matches, axis=1)):
+                    trans = False
+                    break
             if trans: break
         # end the recursion here:
         if not trans: return
@@ -870,12 +1043,14 @@ class Crystal(object):
             newatomlist = []
             avedisplist = []
             newspinlist = []
-            for u, s in zip(atomlist, spinlist):
-                v = incell(np.array([u[m]*mult[0],
-                                     u[i] - u[m]*mult[1],
-                                     u[j] - u[m]*mult[2]])) if self.dim == 3 else \
-                    incell(np.array([u[m]*mult[0],
-                                     u[i] - u[m]*mult[1]]))
+            # transform all of the positions into the reduced cell at once
+            atomarray = np.array(atomlist)
+            vlist = incell(np.column_stack((atomarray[:, m]*mult[0],
+                                            atomarray[:, i] - atomarray[:, m]*mult[1],
+                                            atomarray[:, j] - atomarray[:, m]*mult[2]))) if self.dim == 3 else \
+                incell(np.column_stack((atomarray[:, m]*mult[0],
+                                        atomarray[:, i] - atomarray[:, m]*mult[1])))
+            for v, s in zip(vlist, spinlist):
                 ind = 0
                 for v1 in newatomlist:
                     # dv = relative displacement of site
@@ -893,7 +1068,7 @@ class Crystal(object):
                     newspinlist.append(s)
             if len(newatomlist)*(M//abs(T[m])) != len(atomlist):
                 raise ArithmeticError('Reduction did not produce correct reduced basis: {}*{} != {}'.format(len(newatomlist), M//abs(T[m]), len(atomlist)))
-            newbasis.append([incell(v+reduction*dv) for v, dv in zip(newatomlist, avedisplist)])
+            newbasis.append(list(incell(np.array(newatomlist) + reduction*np.array(avedisplist))))
             newspins.append([reduction*s for s in newspinlist])
         self.basis = newbasis
         if self.spins is not None: self.spins = newspins
@@ -908,7 +1083,9 @@ class Crystal(object):
         :return atomic basis: list of list of positions
         """
         invsuper = np.linalg.inv(supercell)
-        return [[incell(np.dot(invsuper, u)) for u in atomlist] for atomlist in self.basis]
+        # transform each chemistry with a single matrix product: rows are positions
+        return [list(incell(np.dot(np.array(atomlist).reshape((-1, self.dim)), invsuper.T)))
+                for atomlist in self.basis]
 
     def minlattice(self):
         """
@@ -918,12 +1095,11 @@ class Crystal(object):
 
         Works recursively, and in-place.
         """
-        magnlist = sorted((np.dot(v, v), idx) for idx, v in enumerate(self.lattice.T))
-        super = np.zeros((self.dim, self.dim), dtype=int)
-        for i, (magn, j) in enumerate(magnlist):
-            super[j, i] = 1
+        # permutation that orders the lattice vectors by length (stable, so ties keep their order)
+        order = np.argsort(np.einsum('ij,ij->j', self.lattice, self.lattice), kind='stable')
+        super = np.eye(self.dim, dtype=int)[:, order]
         # check that we have a right-handed lattice
-        if np.linalg.det(self.lattice) * np.linalg.det(super) < 0:
+        if _det(self.lattice) * _det(super) < 0:
             super[:, -1] = -super[:, -1]
         if not np.all(super == np.eye(self.dim, dtype=int)):
             self.lattice = np.dot(self.lattice, super)
@@ -961,7 +1137,20 @@ class Crystal(object):
         :return volume: cell volume
         :return metric tensor: 3x3
         """
-        return abs(float(np.linalg.det(self.lattice))), np.dot(self.lattice.T, self.lattice)
+        return abs(float(_det(self.lattice))), np.dot(self.lattice.T, self.lattice)
+
+    def _latticesetup(self):
+        """
+        Computes all of the quantities that derive only from the lattice vectors: inverse,
+        volume, metric tensor, reciprocal lattice, and BZ volume. Uses the closed-form
+        inverse and determinant, and stores everything as contiguous arrays.
+        """
+        self.lattice = np.ascontiguousarray(self.lattice)
+        self.invlatt = np.ascontiguousarray(_inv(self.lattice))
+        self.volume, self.metric = self.calcmetric()
+        self.metric = np.ascontiguousarray(self.metric)
+        self.reciplatt = np.ascontiguousarray(2. * np.pi * self.invlatt.T)
+        self.BZvol = (2. * np.pi) ** self.dim / self.volume
 
     def inBZ(self, vec, BZG=None, threshold=1e-5):
         """
@@ -972,9 +1161,26 @@ class Crystal(object):
         :param threshold: double, optional, threshold to use for "equality"
         :return inBZ: False if outside the BZ, True otherwise
         """
-        if BZG is None: BZG = self.BZG
+        if BZG is None:
+            BZG, G2 = self.BZG, self.BZG2()
+        else:
+            BZG = np.array(BZG).reshape(-1, self.dim)
+            G2 = np.einsum('ij,ij->i', BZG, BZG)
         # checks that vec.G < G^2 for all G (and throws out the option that vec == G, in case threshold == 0)
-        return all(np.dot(vec, G) < (np.dot(G, G) + threshold) for G in BZG if not np.all(vec == G))
+        return bool(np.all((np.dot(BZG, vec) < G2 + threshold) | np.all(BZG == vec, axis=1)))
+
+    def BZG2(self):
+        """
+        Returns the squared magnitudes of the BZG vectors; computed on the first call, and stored
+        afterwards (until self.BZG changes).
+
+        :return G2: array[NG] of G^2 for each G in BZG
+        """
+        BZG, G2 = self.__dict__.get('_BZG2cache', (None, None))
+        if BZG is not self.BZG:
+            G2 = np.einsum('ij,ij->i', self.BZG, self.BZG)
+            self._BZG2cache = (self.BZG, G2)
+        return G2
 
     def genBZG(self):
         """
@@ -982,14 +1188,23 @@ class Crystal(object):
 
         :return Garray: array of G vectors that define the BZ, in Cartesian coordinates
         """
-        # Start with a list of possible vectors; add those that define the BZ...
-        BZG = []
-        for nv in itertools.product(range(-3, 4), repeat = self.dim):
-            if all(n == 0 for n in nv): continue
-            vec = np.dot(self.lattice, nv)
-            if self.inBZ(vec, BZG, threshold=0): BZG.append(np.dot(self.reciplatt, nv))
-        # ... and use a list comprehension to only keep those that still remain
-        return np.array([0.5 * vec for vec in BZG if self.inBZ(vec, BZG, threshold=0)])
+        # Start with an array of possible vectors (in the same order as itertools.product), and
+        # compute all of the inBZ comparisons at once: vec.G < G^2 for each pair (vec, G),
+        # unless vec == G
+        nvlist = np.array([nv for nv in itertools.product(range(-3, 4), repeat=self.dim) if any(nv)])
+        veclist = np.dot(nvlist, self.lattice.T)
+        Glist = np.dot(nvlist, self.reciplatt.T)
+        G2 = np.einsum('ij,ij->i', Glist, Glist)
+        inside = (np.dot(veclist, Glist.T) < G2) | np.all(veclist[:, None, :] == Glist[None, :, :], axis=-1)
+        # add those that define the BZ; each candidate is tested against those added before it...
+        added = np.zeros(len(nvlist), dtype=bool)
+        for i, insiderow in enumerate(inside):
+            added[i] = np.all(insiderow[added])
+        BZG = Glist[added]
+        # ... and only keep those that still remain when tested against all of them
+        inside = (np.dot(BZG, BZG.T) < np.einsum('ij,ij->i', BZG, BZG)) | \
+                 np.all(BZG[:, None, :] == BZG[None, :, :], axis=-1)
+        return 0.5 * BZG[np.all(inside, axis=1)]
 
     def gengroup(self):
         """
@@ -1005,48 +1220,45 @@ class Crystal(object):
             rot2, rot4, rot6 = (1, -1), (1, -1, 1j, -1j), tuple(np.exp(n * np.pi * 2j / 6) for n in range(6))
             return (rot2, rot2, rot6, rot4, None, rot6)[abs(optype) - 1]  # (+-1, +-2, +-3, +-4, .., +-6)
 
-        def quickabsdet(M):
-            if M.shape == (2,2): return abs(M[0,0]*M[1,1]-M[0,1]*M[1,0])
-            if M.shape == (3,3): return abs(M[0,0]*(M[1,1]*M[2,2]-M[1,2]*M[2,1])
-                                            -M[0,1]*(M[1,0]*M[2,2]-M[1,2]*M[2,0])
-                                            +M[0,2]*(M[1,0]*M[2,1]-M[1,1]*M[2,0]))
-
         groupops = []
-        supercellvect = [np.array(nv) for nv in itertools.product(range(-1,2), repeat=self.dim)
-                         if any(n != 0 for n in nv)]
-        matchvect = [[u for u in supercellvect
-                      if self.__isclose__(np.dot(u, np.dot(self.metric, u)),
-                                          self.metric[d, d])] for d in range(self.dim)]
-        # if we don't have spins, just make a big list of lists of 0, otherwise there's too many "if spins None..."
-        if self.spins is None:
-            spins = [[0 for u in atomlist] for atomlist in self.basis]
-        else:
-            spins = self.spins
-        for supertuple in itertools.product(*matchvect):
-            supercell = np.array(supertuple).T
-            if quickabsdet(supercell) != 1: continue
-            if self.__isclose__(np.dot(supercell.T, np.dot(self.metric, supercell)), self.metric):
-                # possible operation--need to check the atomic positions with spin phase factors
-                optype = GroupOp.optype(supercell)
-                cartrot = np.dot(self.lattice, np.dot(supercell, self.invlatt))
-                detrot = 1 if optype > 0 else -1
-                # apply cartesian rotation to spins... if they're vectors; else, do nothing
-                rotspins = [[detrot * s if isinstance(s, Number) else np.dot(cartrot, s)
-                             for s in spinlist]
-                            for spinlist in spins]
-                # if det * tr < -1 or det * tr > 3: return False
-                for phase in rootsofunity(optype):
-                    newspins = [[phase * s for s in spinlist] for spinlist in rotspins]
-                    trans, indexmap = maptranslation(self.basis,
-                                                     [[np.dot(supercell, u)
-                                                       for u in atomlist]
-                                                      for atomlist in self.basis],
-                                                     spins, newspins, threshold=self.threshold)
-                    if indexmap is not None:
-                        groupops.append(GroupOp(supercell,
-                                                trans,
-                                                cartrot,
-                                                indexmap))
+        supercellvect = np.array([nv for nv in itertools.product(range(-1,2), repeat=self.dim) if any(nv)])
+        supercellmagn = np.einsum('ij,jk,ik->i', supercellvect, self.metric, supercellvect)
+        matchvect = [supercellvect[np.isclose(supercellmagn, self.metric[d, d], atol=self.threshold)]
+                     for d in range(self.dim)]
+        # all candidate supercells at once, in itertools.product order: column d of supercells[n]
+        # is one of the matchvect[d] vectors
+        indices = np.meshgrid(*[np.arange(len(ulist)) for ulist in matchvect], indexing='ij')
+        supercells = np.stack([ulist[index.ravel()] for ulist, index in zip(matchvect, indices)], axis=-1)
+        # keep only those that are unimodular, and leave the metric unchanged
+        supercells = supercells[np.abs(_det(supercells)) == 1]
+        supermetric = np.einsum('nji,jk,nkl->nil', supercells, self.metric, supercells)
+        supercells = supercells[np.all(np.isclose(supermetric, self.metric, atol=self.threshold), axis=(1, 2))]
+        for supercell in supercells:
+            # possible operation--need to check the atomic positions with spin phase factors
+            optype = GroupOp.optype(supercell)
+            cartrot = np.dot(self.lattice, np.dot(supercell, self.invlatt))
+            rotbasis = [[np.dot(supercell, u) for u in atomlist] for atomlist in self.basis]
+            if self.spins is None:
+                # without spins, there are no phase factors to consider
+                trans, indexmap = maptranslation(self.basis, rotbasis, threshold=self.threshold)
+                if indexmap is not None:
+                    groupops.append(GroupOp(supercell, trans, cartrot, indexmap))
+                continue
+            detrot = 1 if optype > 0 else -1
+            # apply cartesian rotation to spins... if they're vectors; else, do nothing
+            rotspins = [[detrot * s if isinstance(s, Number) else np.dot(cartrot, s)
+                         for s in spinlist]
+                        for spinlist in self.spins]
+            # if det * tr < -1 or det * tr > 3: return False
+            for phase in rootsofunity(optype):
+                newspins = [[phase * s for s in spinlist] for spinlist in rotspins]
+                trans, indexmap = maptranslation(self.basis, rotbasis,
+                                                 self.spins, newspins, threshold=self.threshold)
+                if indexmap is not None:
+                    groupops.append(GroupOp(supercell,
+                                            trans,
+                                            cartrot,
+                                            indexmap))
         return frozenset(groupops)
 
     def strain(self, eps):
@@ -1059,7 +1271,10 @@ class Crystal(object):
         if __debug__:
             if type(eps) is not np.ndarray or eps.shape != (self.dim, self.dim):
                 raise TypeError('strain is not a 3x3 tensor')
-        return Crystal(np.dot(np.eye(self.dim) + eps, self.lattice), self.basis,
+        # deformation gradient 1 + eps: add 1 to the diagonal of a copy, without an identity matrix
+        F = np.array(eps, dtype=float)
+        F.flat[::self.dim + 1] += 1.
+        return Crystal(np.dot(F, self.lattice), self.basis,
                        chemistry=self.chemistry, spins=self.spins, threshold=self.threshold)
 
     def addbasis(self, basis, chemistry=None, spins=None):
@@ -1078,13 +1293,13 @@ class Crystal(object):
         if type(basis[0]) == np.ndarray:
             for u in basis:
                 if type(u) is not np.ndarray: raise TypeError("{} in {} is not an array".format(u, basis))
-            newbasis = [[incell(u) for u in basis]]
+            newbasis = [list(incell(np.array(basis)))]
         else:
             for elem in basis:
                 if type(elem) is not list: raise TypeError("{} in basis is not a list".format(elem))
                 for u in elem:
                     if type(u) is not np.ndarray: raise TypeError("{} in {} is not an array".format(u, elem))
-            newbasis = [[incell(u) for u in atombasis] for atombasis in basis]
+            newbasis = [list(incell(np.array(atombasis))) for atombasis in basis]
         if chemistry is None:
             newchemistry = self.chemistry + [i + self.Nchem for i in range(len(newbasis))]
         else:
@@ -1241,6 +1456,63 @@ class Crystal(object):
             if type(x) is not np.ndarray: raise TypeError
         return np.dot(g.cartrot, x) + np.dot(self.lattice, g.trans)
 
+    def basisarrays(self):
+        """
+        Returns the basis as one contiguous array of positions for each chemistry; constructed on the first
+        call, and stored afterwards (until self.basis changes). The arrays are read-only.
+
+        :return basisarrays: list of array[Nc, 3] of positions in direct coordinates
+        """
+        basiscache = self.__dict__.get('_basiscache')
+        if basiscache is None or basiscache[0] is not self.basis or len(basiscache[1]) != len(self.basis) or \
+                any(cached is not atomlist or len(atomarray) != len(atomlist)
+                    for cached, atomarray, atomlist in zip(basiscache[1], basiscache[2], self.basis)):
+            basisarrays = [_readonly(np.ascontiguousarray(np.array(atomlist, dtype=float).reshape(-1, self.dim)))
+                           for atomlist in self.basis]
+            basiscache = (self.basis, tuple(self.basis), basisarrays)
+            self._basiscache = basiscache
+        return basiscache[2]
+
+    def _Garrays(self):
+        """
+        Returns the rotations, translations, and Cartesian rotations of all of the group operations,
+        each stacked into one array, in the order of iteration over self.G; constructed on the first
+        call, and stored afterwards (until self.G changes).
+
+        :return Grot: array[Ng, 3, 3] of (integer) rot matrices
+        :return Gtrans: array[Ng, 3] of translations
+        :return Gcartrot: array[Ng, 3, 3] of cartrot matrices
+        :return Gindexmap: list of array[Ng, Nc] of indexmaps, one for each chemistry
+        """
+        Garrays = self.__dict__.get('_Garraycache')
+        if Garrays is None or Garrays[0] is not self.G:
+            Garrays = (self.G,
+                       np.array([g.rot for g in self.G]),
+                       np.array([g.trans for g in self.G]),
+                       np.array([g.cartrot for g in self.G]),
+                       [np.array([g.indexmaparray()[c] for g in self.G], dtype=int).reshape(len(self.G), -1)
+                        for c in range(self.Nchem)])
+            self._Garraycache = Garrays
+        return Garrays[1:]
+
+    def Gcartrot(self):
+        """
+        Returns the Cartesian rotation matrices of all of the group operations, stacked into one array,
+        in the order of iteration over self.G; constructed on the first call, and stored afterwards.
+
+        :return Gcartrot: array[Ng, 3, 3] of cartrot matrices
+        """
+        return self._Garrays()[2]
+
+    def g_direc_all(self, direc):
+        """
+        Apply every space group operation to a direction; same as g_direc for each g in self.G.
+
+        :param direc: 3-vector direction
+        :return gdireclist: array[Ng, 3] of directions, in the order of iteration over self.G
+        """
+        return np.dot(self.Gcartrot(), direc)
+
     def g_direc_equivalent(self, d1, d2, threshold=1e-8):
         """
         Tells us if two directions are equivalent by according to the space group
@@ -1250,7 +1522,11 @@ class Crystal(object):
         :param threshold: threshold for equality
         :return equivalent: True if equivalent by a point group operation
         """
-        return any(np.all(abs(d1 - self.g_direc(g, d2)) < threshold) for g in self.G)
+        # rotations preserve length, so if the lengths differ by more than the largest difference
+        # allowed by the componentwise threshold, no operation can map one onto the other
+        if abs(np.sqrt(np.dot(d1, d1)) - np.sqrt(np.dot(d2, d2))) >= np.sqrt(len(d1)) * threshold:
+            return False
+        return bool(np.any(np.all(abs(d1 - self.g_direc_all(d2)) < threshold, axis=1)))
 
     def genpoint(self):
         """
@@ -1261,12 +1537,60 @@ class Crystal(object):
         """
         if self.N == 1:
             return [[self.G]]
-        origin = np.zeros(self.dim, dtype=int)
-        return [[frozenset([g - self.g_pos(g, origin, (atomtypeindex, atomindex))[0]
-                            for g in self.G
-                            if g.indexmap[atomtypeindex][atomindex] == atomindex])
-                 for atomindex in range(len(atomlist))]
-                for atomtypeindex, atomlist in enumerate(self.basis)]
+        Glist = list(self.G)  # same order as the stacked arrays
+        Gindexmap = self._Garrays()[3]
+        Gpointlists = []
+        for atomtypeindex, atomlist in enumerate(self.basis):
+            # operations that leave each site unchanged, and the lattice vector that each moves the site by
+            fixed = (Gindexmap[atomtypeindex] == np.arange(len(atomlist)))
+            delu = self._Glatticeshift(atomtypeindex)
+            Gpointlists.append([frozenset([Glist[n] - delu[n, atomindex] for n in np.flatnonzero(fixed[:, atomindex])])
+                                for atomindex in range(len(atomlist))])
+        return Gpointlists
+
+    def _Glatticeshift(self, chem):
+        """
+        Lattice vector that each group operation moves each site of a chemistry by; that is, the
+        lattice vector that g_pos returns for each site in the origin unit cell, for every g (in
+        the order of iteration over self.G).
+
+        :param chem: index corresponding to the chemistry
+        :return delu: array[Ng, Nc, 3] (integer) of lattice vectors in direct coordinates
+        """
+        Grot, Gtrans, Gcartrot, Gindexmap = self._Garrays()
+        basisarrays = self.basisarrays()
+        shiftcache = self.__dict__.get('_Glatticeshiftcache')
+        if shiftcache is None or shiftcache[0] is not self.G or shiftcache[1] is not basisarrays:
+            shiftcache = (self.G, basisarrays, {})
+            self._Glatticeshiftcache = shiftcache
+        delu = shiftcache[2].get(chem)
+        if delu is None:
+            atomarray = basisarrays[chem]
+            delu = _readonly(np.round(np.einsum('gij,nj->gni', Grot, atomarray) + Gtrans[:, None, :] -
+                                      atomarray[Gindexmap[chem]]).astype(int))
+            shiftcache[2][chem] = delu
+        return delu
+
+    def g_pos_all(self, lattvec, ind):
+        """
+        Apply every space group operation to an atom position specified by its lattice and index;
+        equivalent to calling g_pos for each g in self.G (in order of iteration), but done in one
+        pass over the stacked group operations.
+
+        :param lattvec: 3-vector (integer) lattice vector in direct coordinates, or array[M, 3]
+        :param ind: two-tuple index specifying the atom: (atomtype, atomindex)
+        :return glatt: array[Ng, 3] (or array[Ng, M, 3]) (integer) lattice vectors in direct coordinates
+        :return gindex: array[Ng] of indices of new basis atoms (the atomtype is unchanged)
+        """
+        Grot, Gtrans, Gcartrot, Gindexmap = self._Garrays()
+        chem, i = ind
+        delu = self._Glatticeshift(chem)[:, i]
+        lattvec = np.asarray(lattvec)
+        if lattvec.ndim == 1:
+            glatt = np.dot(Grot, lattvec) + delu
+        else:
+            glatt = np.einsum('gij,mj->gmi', Grot, lattvec) + delu[:, None, :]
+        return glatt, Gindexmap[chem][:, i]
 
     def genWyckoffsets(self):
         """
@@ -1276,12 +1600,25 @@ class Crystal(object):
         """
         if self.N == 1:
             return frozenset([frozenset([(0, 0)])])
-        # this is a little suboptimal if our basis is huge--it leans heavily
-        # on the construction of sets to make the checks easy.
-        return frozenset([frozenset([(ind[0], g.indexmap[ind[0]][ind[1]])
-                                     for g in self.G])
+        # each site is mapped onto the sites in column ind[1] of the stacked indexmaps
+        Gindexmap = self._Garrays()[3]
+        return frozenset([frozenset((ind[0], j) for j in Gindexmap[ind[0]][:, ind[1]].tolist())
                           for ind in self.atomindices])
 
+    def Wyckoffmap(self):
+        """
+        Returns a dictionary that maps each atom index (c,i) to the Wyckoff set (from self.Wyckoff)
+        that contains it; constructed on the first call, and stored afterwards (until self.Wyckoff
+        changes). Should not be modified.
+
+        :return Wyckoffmap: dictionary of (c,i): frozenset of (c,i) tuples
+        """
+        Wyckoff, Wyckoffmap = self.__dict__.get('_Wyckoffmapcache', (None, None))
+        if Wyckoff is not self.Wyckoff:
+            Wyckoffmap = {ci: iset for iset in self.Wyckoff for ci in iset}
+            self._Wyckoffmapcache = (self.Wyckoff, Wyckoffmap)
+        return Wyckoffmap
+
     def Wyckoffpos(self, uvec):
         """
         Generates all the equivalent Wyckoff positions for a unit cell vector.
@@ -1289,12 +1626,15 @@ class Crystal(object):
         :param uvec: 3-vector (float) vector in direct coordinates
         :return Wyckofflist: list of equivalent Wyckoff positions
         """
-        lis = []
-        zero = np.zeros(self.dim, dtype=int)
-        for u in (self.g_vect(g, zero, uvec)[1] for g in self.G):
-            if not np.any([self.__isclose__(u, u1) for u1 in lis]):
-                lis.append(u)
-        return lis
+        Grot, Gtrans, Gcartrot, Gindexmap = self._Garrays()
+        # all of the images at once (same as g_vect), then compare every pair of images
+        ulist = incell(np.dot(Grot, uvec) + Gtrans)
+        close = np.all(np.isclose(ulist[:, None, :], ulist[None, :, :], atol=self.threshold), axis=-1)
+        # keep each image that isn't close to one we've already kept
+        keep = np.zeros(len(ulist), dtype=bool)
+        for i, closerow in enumerate(close):
+            keep[i] = not np.any(closerow[keep])
+        return list(ulist[keep])
 
     def VectorBasis(self, ind):
         """
@@ -1397,16 +1737,13 @@ class Crystal(object):
         nmax = [int(np.round(np.sqrt(self.metric[i, i]))) + 1
                 for i in range(self.dim)]
         nranges = [range(-n, n+1) for n in nmax]
-        supervect = [np.array(ntup) for ntup in itertools.product(*nranges)]
-        lis = []
-        u0 = self.basis[ind[0]][ind[1]]
-        for u1 in self.basis[ind[0]]:
-            du = u1 - u0
-            for n in supervect:
-                dx = self.unit2cart(n, du)
-                if np.dot(dx, dx) > 0 and np.dot(dx, dx) < r2:
-                    lis.append(dx)
-        return lis
+        supervect = np.array(list(itertools.product(*nranges)))
+        atomarray = self.basisarrays()[ind[0]]
+        # all of the displacements from u0 to the images of every u1 at once:
+        dxlist = np.dot(((atomarray - atomarray[ind[1]])[:, None, :] + supervect[None, :, :]).reshape(-1, self.dim),
+                        self.lattice.T)
+        dx2 = np.einsum('ij,ij->i', dxlist, dxlist)
+        return list(dxlist[(dx2 > 0) & (dx2 < r2)])
 
     def jumpnetwork(self, chem, cutoff, closestdistance=0):
         """
@@ -1422,38 +1759,42 @@ class Crystal(object):
           ``((i,j), dx)`` corresponding to jump from :math:`i \\to j` with vector :math:`\mathbf{\delta x}`
         """
 
-        # should we consider changing the lists to tuples? Not sure if there's any efficiency gain
-        def inlist(tup, dx, lis):
-            """Determines if (i,j), dx is in our list"""
-            # a little confusing: run through all transition tuples, see if we find our example
-            return any(tup == ij and self.__isclose__(dx, v) for translist in lis for ij, v in translist)
-
         r2 = cutoff * cutoff
         nmax = [int(np.round(np.sqrt(r2/self.metric[i, i]))) + 1
                 for i in range(self.dim)]
         nranges = [range(-n, n+1) for n in nmax]
-        supervect = [np.array(ntup) for ntup in itertools.product(*nranges)]
+        supervect = np.array(list(itertools.product(*nranges)))
         lis = []
-        center = np.zeros(self.dim, dtype=int)
+        # a transition i -> j with displacement dx is uniquely identified by ((i,j), R), where R is
+        # the (integer) lattice vector between the unit cells of i and j; we keep a set of those
+        # keys for every transition in lis, so that checking for a new transition is a lookup
+        seen = set()
+        basisarray = self.basisarrays()[chem]
+        zero = np.zeros(self.dim, dtype=int)
         for i, u0 in enumerate(self.basis[chem]):
+            # where all of the group operations send i (in the origin unit cell): i -> i1 in cell R1
+            R1list, ilist = self.g_pos_all(zero, (chem, i))
             for j, u1 in enumerate(self.basis[chem]):
-                du = u1 - u0
-                for n in supervect:
-                    dx = self.unit2cart(n, du)
-                    if np.dot(dx, dx) > 0 and np.dot(dx, dx) < r2:
-                        # we have a valid transition; first check that we haven't already looked at it
-                        if not inlist((i, j), dx, lis):
-                            trans = []
-                            for g in self.G:
-                                # rotate through all combinations of i->j using space group symmetry
-                                R1, ind1 = self.g_pos(g, center, (chem, i))
-                                R2, ind2 = self.g_pos(g, n, (chem, j))
-                                tup = (ind1[1], ind2[1])
-                                dx = self.pos2cart(R2, ind2) - self.pos2cart(R1, ind1)
-                                if not any(tup == ij and self.__isclose__(dx, v) for ij, v in trans):
-                                    trans.append((tup, dx))
-                                    trans.append(((tup[1], tup[0]), -dx))
-                            lis.append(trans)
+                # only consider the lattice vectors that give a displacement inside the cutoff
+                dxlist = np.dot(supervect + (u1 - u0), self.lattice.T)
+                dx2 = np.einsum('ij,ij->i', dxlist, dxlist)
+                for n in supervect[(dx2 > 0) & (dx2 < r2)]:
+                    # we have a valid transition; first check that we haven't already looked at it
+                    if ((i, j), tuple(n.tolist())) not in seen:
+                        trans = []
+                        # rotate through all combinations of i->j using space group symmetry: for each g,
+                        # i -> i1 (in cell R1) and j -> j1 (in cell R2), giving the lattice vector R2 - R1
+                        R2list, jlist = self.g_pos_all(n, (chem, j))
+                        Rlist = R2list - R1list
+                        dxlist = np.dot(Rlist + basisarray[jlist] - basisarray[ilist], self.lattice.T)
+                        for tup, R, dx in zip(zip(ilist.tolist(), jlist.tolist()), Rlist.tolist(), dxlist):
+                            key = (tup, tuple(R))
+                            if key not in seen:
+                                trans.append((tup, dx))
+                                trans.append(((tup[1], tup[0]), -dx))
+                                seen.add(key)
+                                seen.add(((tup[1], tup[0]), tuple(-x for x in R)))
+                        lis.append(trans)
         # now for collision detection:
         if type(closestdistance) is list:
             # quick sanity check to make sure we don't include collision detection on
@@ -1466,28 +1807,33 @@ class Crystal(object):
                 # skip the negative distances; we still check 0 because straight line paths
                 # through sites should (probably) still be excluded
                 continue
-            for u0 in self.basis[c]:
-                for n in supervect:
-                    # check each transition in the list (we need to do list(lis) because
-                    # we will modify lis in place with remove's, and its dangerous to pull
-                    # off as we iterate through:
-                    # for trans in lis.copy():
-                    for ntrans in range(len(lis)-1,-1,-1):
-                        trans = lis[ntrans]
-                        t = trans[0]  # representative transition
-                        dx = t[1]
-                        # take our starting point relative to the first item in the tuple
-                        xRa = self.unit2cart(n, u0 - self.basis[chem][t[0][0]])
-                        xRa2 = np.dot(xRa, xRa)
-                        xRa_dx = np.dot(xRa, dx)
-                        dx2 = np.dot(dx, dx)
-                        if 0 <= xRa_dx <= dx2:
-                            d2 = (xRa2 * dx2 - xRa_dx * xRa_dx) / dx2
-                            if np.isclose(d2, mindist2) or d2 < mindist2:
-                                # lis.remove(trans)
-                                lis.pop(ntrans)
-        lis.sort(key=lambda entry: min(i + j + 1e-3 * np.dot(dx, dx) for (i, j), dx in entry))
-        return lis
+            # positions of every site of chemistry c in every cell, relative to each starting site i;
+            # computed once per i and reused for all of the transitions that start there
+            xRlist = {}
+            collide = []
+            for trans in lis:
+                (i, j), dx = trans[0]  # representative transition
+                if i not in xRlist:
+                    du = self.basisarrays()[c] - self.basis[chem][i]
+                    xRa = np.dot((supervect[:, None, :] + du[None, :, :]).reshape(-1, self.dim), self.lattice.T)
+                    xRlist[i] = xRa, np.einsum('ij,ij->i', xRa, xRa)
+                xRa, xRa2 = xRlist[i]
+                xRa_dx = np.dot(xRa, dx)
+                dx2 = np.dot(dx, dx)
+                # only sites whose projection lies along the jump can collide; then check the
+                # (squared) distance from the site to the jump path
+                along = (0 <= xRa_dx) & (xRa_dx <= dx2)
+                d2 = (xRa2[along] * dx2 - xRa_dx[along] * xRa_dx[along]) / dx2
+                collide.append(np.any(np.isclose(d2, mindist2) | (d2 < mindist2)))
+            lis = [trans for trans, coll in zip(lis, collide) if not coll]
+        # sort by the smallest i + j + 1e-3 dx^2 in each entry, computed from the stacked transitions
+        # of each entry; a stable argsort keeps ties in their original order (as list.sort would)
+        keys = []
+        for entry in lis:
+            ijlist = np.array([i + j for (i, j), dx in entry])
+            dxlist = np.array([dx for (i, j), dx in entry])
+            keys.append(np.min(ijlist + 1e-3 * np.einsum('ij,ij->i', dxlist, dxlist)))
+        return [lis[n] for n in np.argsort(keys, kind='stable')]
 
     def jumpnetwork2lattice(self, chem, jumpnetwork):
         """
@@ -1500,10 +1846,19 @@ class Crystal(object):
         :return jumplattice: list of symmetry-unique transitions; each is a list of tuples:
           ``((i,j), R)`` corresponding to jump from i in unit cell 0 -> j in unit cell R
         """
-        return [[((i, j),
-                  np.round(np.dot(self.invlatt, dx) + self.basis[chem][i] - self.basis[chem][j]).astype(int))
-                 for (i, j), dx in jumplist]
-                for jumplist in jumpnetwork]
+        basisarray = self.basisarrays()[chem]
+        jumplattice = []
+        for jumplist in jumpnetwork:
+            if len(jumplist) == 0:
+                jumplattice.append([])
+                continue
+            # convert all of the jumps in the list at once
+            ijarray = np.array([ij for ij, dx in jumplist])
+            dxarray = np.array([dx for ij, dx in jumplist])
+            Rarray = np.round(np.dot(dxarray, self.invlatt.T) +
+                              basisarray[ijarray[:, 0]] - basisarray[ijarray[:, 1]]).astype(int)
+            jumplattice.append([(ij, R) for (ij, dx), R in zip(jumplist, Rarray)])
+        return jumplattice
 
     def sitelist(self, chem):
         """
@@ -1513,9 +1868,10 @@ class Crystal(object):
         :param chem: index corresponding to chemistry to consider
         :return symmequivsites: list of lists of indices that are equivalent by symmetry
         """
-        return sorted([sorted(i for c, i in l)  # strips out the chemistry index; sorted for readability
-                       for l in [list(s) for s in self.Wyckoff]  # converts to list of lists
-                       if l[0][0] == chem])  # select only those with correct chemistry
+        # every site in a Wyckoff set has the same chemistry, so we only need to check one
+        return sorted([sorted(i for c, i in s)  # strips out the chemistry index; sorted for readability
+                       for s in self.Wyckoff
+                       if next(iter(s))[0] == chem])  # select only those with correct chemistry
 
     def fullkptmesh(self, Nmesh):
         """
@@ -1525,23 +1881,32 @@ class Crystal(object):
         :param Nmesh: mesh divisions Nmesh[0] x Nmesh[1] x Nmesh[2]
         :return kpt: array[Nkpt][3] of kpoints
         """
-        Nkpt = np.product(Nmesh)
+        Nkpt = np.prod(Nmesh)
         if Nkpt == 0: return
-        # dN = np.array([1 / x for x in Nmesh])
-        # # use a list comprehension to iterate and build:
-        # kptfull = np.array([np.dot(self.reciplatt, (n0 * dN[0], n1 * dN[1], n2 * dN[2]))
-        #                     for n0 in range(-Nmesh[0] // 2 + 1, Nmesh[0] // 2 + 1)
-        #                     for n1 in range(-Nmesh[1] // 2 + 1, Nmesh[1] // 2 + 1)
-        #                     for n2 in range(-Nmesh[2] // 2 + 1, Nmesh[2] // 2 + 1)])
-        kdiv = [np.linspace(1/2,-1/2,Nm,endpoint=False) for Nm in Nmesh]
-        kptfull = np.array([np.dot(self.reciplatt, ktup) for ktup in itertools.product(*kdiv)])
+        # the mesh points, in units of the reciprocal lattice vectors, run from 1/2 down
+        # (as np.linspace(1/2, -1/2, Nm, endpoint=False) along each direction), with the last
+        # direction varying fastest; one matrix product then gives all of the k-points
+        Nmesh = np.array(Nmesh)
+        kdiv = np.indices(Nmesh).reshape(len(Nmesh), -1).T * (-1. / Nmesh) + 0.5
+        kptfull = np.dot(kdiv, self.reciplatt.T)
         # run through list to ensure that all k-points are inside the BZ
-        Gmin = min(np.dot(G, G) for G in self.BZG)
-        for k in kptfull:
-            if np.dot(k, k) >= Gmin:
-                for G in self.BZG:
-                    if np.dot(k, G) > np.dot(G, G):
-                        k -= 2. * G
+        G2 = self.BZG2()
+        Gmin = np.min(G2)
+        # each pass applies every G to all of the k-points at once; folding a point that lies beyond
+        # a face (by more than threshold, so points on a face stay put) strictly reduces |k|, and
+        # we repeat until nothing moves, with a cap on the number of passes
+        for npass in range(_FOLDBZ_MAXPASSES):
+            folded = False
+            outside = np.einsum('ij,ij->i', kptfull, kptfull) >= Gmin
+            for G, GG in zip(self.BZG, G2):
+                fold = outside & (np.dot(kptfull, G) > GG + self.threshold)
+                if np.any(fold):
+                    kptfull[fold] -= 2. * G
+                    folded = True
+            if not folded: break
+        else:
+            warnings.warn('k-point mesh {} not folded into the BZ after {} passes'.format(Nmesh, _FOLDBZ_MAXPASSES),
+                          RuntimeWarning, stacklevel=2)
         return kptfull
 
     def reducekptmesh(self, kptfull, threshold=None):
@@ -1555,12 +1920,14 @@ class Crystal(object):
         :return weight: array[Nsymm] of weights (integrates to 1)
         """
         eps = self.threshold if threshold is None else threshold
-        kptlist = list(kptfull)
+        kptlist = np.array(kptfull)
         Nkpt = len(kptlist)
-        kptlist.sort(key=lambda k: np.vdot(k, k))
+        k2list = np.einsum('ij,ij->i', kptlist, kptlist)
+        order = np.argsort(k2list, kind='stable')
+        kptlist, k2list = kptlist[order], k2list[order]
         k2_indices = []
-        k2old = np.vdot(kptlist[0], kptlist[0])
-        for i, k2 in enumerate([np.vdot(k, k) for k in kptlist]):
+        k2old = k2list[0]
+        for i, k2 in enumerate(k2list):
             if k2 > (k2old + eps):
                 k2_indices.append(i)
                 k2old = k2
@@ -1571,25 +1938,20 @@ class Crystal(object):
         kmin = 0
         basewt = 1 / Nkpt
         for kmax in k2_indices:
-            complist = []
-            symmcomplist = []
-            wtlist = []
-            for k in kptlist[kmin:kmax]:
-                match = False
-                for i, symmcomp in enumerate(symmcomplist):
-                    # if any(np.allclose(k, gk, rtol=0, atol=threshold) for gk in symmcomp):
-                    if any(np.all(abs(k - gk) < eps) for gk in symmcomp):
-                        # update weight, kick out
-                        wtlist[i] += basewt
-                        match = True
-                        continue
-                if not match:
-                    # new symmetry point!
-                    complist.append(k)
-                    symmcomplist.append([self.g_direc(g, k) for g in self.G])
-                    wtlist.append(basewt)
-            kptsym += complist
-            wsym += wtlist
+            kshell = kptlist[kmin:kmax]
+            # each point that isn't already in a star starts a new one: we compare every point in
+            # the shell against all of the symmetry-equivalent images of the new point at once
+            instar = np.zeros(len(kshell), dtype=bool)
+            for i, k in enumerate(kshell):
+                if instar[i]: continue
+                symmcomp = self.g_direc_all(k)
+                # if any(np.allclose(k, gk, rtol=0, atol=threshold) for gk in symmcomp):
+                match = np.any(np.all(abs(kshell[i:, None, :] - symmcomp[None, :, :]) < eps, axis=-1), axis=1)
+                match &= ~instar[i:]
+                instar[i:] |= match
+                # new symmetry point!
+                kptsym.append(k)
+                wsym.append(basewt * np.sum(match))
             kmin = kmax
         return np.array(kptsym), np.array(wsym)
 
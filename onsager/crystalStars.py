@@ -71,6 +71,14 @@ class PairState(collections.namedtuple('PairState', 'i j R dx')):
         """Return a proper dict"""
         return {'i': self.i, 'j': self.j, 'R': self.R, 'dx': self.dx}
 
+    @property
+    def r2(self):
+        """Squared length of dx; computed once, as it is used repeatedly for sorting and comparison"""
+        r2 = self.__dict__.get('_r2')
+        if r2 is None:
+            r2 = self.__dict__['_r2'] = np.dot(self.dx, self.dx)
+        return r2
+
     def __sane__(self, crys, chem):
         """Determine if the dx value makes sense given everything else..."""
         return np.allclose(self.dx, np.dot(crys.lattice, self.R + crys.basis[chem][self.j] - crys.basis[chem][self.i]))
@@ -165,7 +173,7 @@ class PairState(collections.namedtuple('PairState', 'i j R dx')):
 
     @classmethod
     def sortkey(cls, entry):
-        return np.dot(entry.dx, entry.dx)
+        return entry.r2
 
     @staticmethod
     def PairState_representer(dumper, data):
@@ -351,8 +359,8 @@ class StarSet(object):
         self.Nstates = len(self.states)
         if self.Nstates > 0:
             x2_indices = []
-            x2old = np.dot(self.states[0].dx, self.states[0].dx)
-            for i, x2 in enumerate([np.dot(st.dx, st.dx) for st in self.states]):
+            x2old = self.states[0].r2
+            for i, x2 in enumerate([st.r2 for st in self.states]):
                 if x2 > (x2old + threshold):
                     x2_indices.append(i)
                     x2old = x2
@@ -513,9 +521,9 @@ class StarSet(object):
         self.states += sorted([s for s in newstateset], key=PairState.sortkey)
         Nnew = len(self.states)
         x2_indices = []
-        x2old = np.dot(self.states[Nold].dx, self.states[Nold].dx)
+        x2old = self.states[Nold].r2
         for i in range(Nold, Nnew):
-            x2 = np.dot(self.states[i].dx, self.states[i].dx)
+            x2 = self.states[i].r2
             if x2 > (x2old + threshold):
                 x2_indices.append(i)
                 x2old = x2
@@ -699,8 +707,8 @@ class StarSet(object):
         self.Nstates = len(self.states)
         if self.Nstates > 0:
             x2_indices = []
-            x2old = np.dot(self.states[0].dx, self.states[0].dx)
-            for i, x2 in enumerate([np.dot(st.dx, st.dx) for st in self.states]):
+            x2old = self.states[0].r2
+            for i, x2 in enumerate([st.r2 for st in self.states]):
                 if x2 > (x2old + threshold):
                     x2_indices.append(i)
                     x2old = x2
@@ -15,7 +15,19 @@ import numpy as np
 import collections, copy, itertools, warnings
 from numbers import Integral
 from onsager import crystal
-from functools import reduce
+from functools import reduce, lru_cache
+
+# cache of the translations (size, invsuper, translist, transdict) of recently used supercell
+# matrices, keyed by the bytes of the matrix; least recently used entries are discarded first
+_TRANSCACHE = collections.OrderedDict()
+_TRANSCACHE_SIZE = 64
+
+
+@lru_cache(maxsize=64)
+def _identgroup(Nsites):
+    """Return the group containing only the identity, for a supercell with Nsites sites (cached)"""
+    return frozenset([crystal.GroupOp.ident([range(Nsites)])])
+
 
 # TODO: add "parser"--read CONTCAR file, create Supercell
 # TODO: output PairState from Supercell
@@ -28,7 +40,7 @@ class Supercell(object):
     as interstitial sites, and specify if we'll have solutes.
     """
 
-    def __init__(self, crys, super, interstitial=(), Nsolute=0, empty=False, NOSYM=False):
+    def __init__(self, crys, super, interstitial=(), Nsolute=0, empty=False, NOSYM=False, dtype=float):
         """
         Initialize our supercell to an empty supercell.
 
@@ -38,9 +50,12 @@ class Supercell(object):
         :param Nsolute: (optional) number of substitutional solute elements to consider; default=0
         :param empty: (optional) designed to allow "copy" to work--skips all derived info
         :param NOSYM: (optional) does not do symmetry analysis (intended ONLY for testing purposes)
+        :param dtype: (optional) floating point type for the positions; default=float, but np.float32
+            halves the memory for large supercells (symmetry analysis uses only integer arithmetic)
         """
         self.crys = crys
-        self.super = super.copy()
+        # all of the arrays we store (super, invsuper, lattice, translist, pos, occ) are C-contiguous
+        self.super = np.array(super, dtype=int, order='C')
         self.interstitial = copy.deepcopy(interstitial)
         self.Nchem = crys.Nchem + Nsolute if Nsolute > 0 else crys.Nchem
         if empty: return
@@ -52,27 +67,55 @@ class Supercell(object):
         self.chemistry = [crys.chemistry[n] if n < crys.Nchem else '' for n in range(self.Nchem + 1)]
         self.chemistry[-1] = 'v'
         self.Wyckofflist, self.Wyckoffchem = [], []
-        for n, (c, i) in enumerate(self.atomindices):
-            for wset in self.Wyckofflist:
-                if n in wset: break
-            if len(self.Wyckofflist) == 0 or n not in wset:
-                # grab the set of (c,i) of Wyckoff sets (next returns first that matches, None if none):
-                indexset = next((iset for iset in self.crys.Wyckoff if (c, i) in iset), None)
+        # the set of (c,i) of the Wyckoff set that contains each (c,i) (stored in the crystal, so shared
+        # by all of its supercells); each set is added to our list the first time we reach one of its atoms
+        Wyckoffmap, found = self.crys.Wyckoffmap(), set()
+        for (c, i) in self.atomindices:
+            indexset = Wyckoffmap[(c, i)]
+            if indexset not in found:
+                found.add(indexset)
                 self.Wyckofflist.append(frozenset([self.indexatom[ci] for ci in indexset]))
                 self.Wyckoffchem.append(self.crys.chemistry[c])
         self.size, self.invsuper, self.translist, self.transdict = self.maketrans(self.super)
-        # self.transdict = {tuple(t):n for n,t in enumerate(self.translist)}
-        self.pos, self.occ = self.makesites(), -1 * np.ones(self.N * self.size, dtype=int)
+        # inverse of super as a float matrix, with the size already divided out
+        self.invsuperfrac = self.invsuper * (1 / self.size)
+        self.maketranskeys()
+        # chemical indices (with -1 for vacancies) fit in a byte for any reasonable number of chemistries
+        occtype = np.int8 if self.Nchem < np.iinfo(np.int8).max else int
+        self.pos, self.occ = self.makesites(dtype), np.full(self.N * self.size, -1, dtype=occtype)
         self.chemorder = [[] for n in range(self.Nchem)]
         if NOSYM:
-            self.G = frozenset([crystal.GroupOp.ident([self.pos])])
+            self.G = _identgroup(self.N * self.size)
         else:
             self.G = self.gengroup()
 
     # some attributes we want to do equate, others we want deepcopy. Equate should not be modified.
     __copyattr__ = ('lattice', 'N', 'chemistry', 'size', 'invsuper',
                     'Wyckofflist', 'Wyckoffchem', 'occ', 'chemorder')
-    __eqattr__ = ('atomindices', 'indexatom', 'translist', 'transdict', 'pos', 'G')
+    __eqattr__ = ('atomindices', 'indexatom', 'translist', 'transdict', 'transcode', 'transorder', 'transkeys',
+                  'invsuperfrac', 'pos', 'G')
+
+    def maketranskeys(self):
+        """
+        Construct the integer keys for the translations used by ``transindex``: each translation
+        (with entries in [0, size)) is encoded as one integer, t.transcode; sorting those gives an
+        array lookup in place of tuples into transdict. Derived entirely from ``size`` and ``translist``.
+        """
+        self.transcode = self.size ** np.arange(2, -1, -1)
+        transkeys = np.dot(self.translist, self.transcode)
+        self.transorder = np.argsort(transkeys)
+        self.transkeys = transkeys[self.transorder]
+
+    def __setstate__(self, state):
+        """
+        Restore from a saved state (YAML, pickle); supercells saved before the translation keys and
+        invsuperfrac were stored are missing them, so we rebuild them here.
+
+        :param state: dictionary of attributes
+        """
+        self.__dict__.update(state)
+        if 'translist' in state and 'transkeys' not in state: self.maketranskeys()
+        if 'invsuper' in state and 'invsuperfrac' not in state: self.invsuperfrac = self.invsuper * (1 / self.size)
 
     def copy(self):
         """
@@ -83,7 +126,10 @@ class Supercell(object):
         """
         supercopy = self.__class__(self.crys, self.super, self.interstitial, self.Nchem - self.crys.Nchem,
                                    empty=True)
-        for attr in self.__copyattr__: setattr(supercopy, attr, copy.deepcopy(getattr(self, attr)))
+        for attr in self.__copyattr__:
+            value = getattr(self, attr)
+            # arrays (occ, lattice, invsuper) only need a flat copy of their data
+            setattr(supercopy, attr, value.copy() if isinstance(value, np.ndarray) else copy.deepcopy(value))
         for attr in self.__eqattr__: setattr(supercopy, attr, getattr(self, attr))
         return supercopy
 
@@ -95,9 +141,11 @@ class Supercell(object):
         :param other: supercell for comparison
         :return: True if same crystal, supercell, occupancy, and ordering; False otherwise
         """
-        return isinstance(other, self.__class__) and np.all(self.super == other.super) and \
-               self.interstitial == other.interstitial and np.allclose(self.pos, other.pos) and \
-               np.all(self.occ == other.occ) and self.chemorder == other.chemorder
+        if self is other: return True
+        # cheapest comparisons first; copies share pos, so we can skip comparing positions then
+        return isinstance(other, self.__class__) and np.array_equal(self.super, other.super) and \
+               self.interstitial == other.interstitial and np.array_equal(self.occ, other.occ) and \
+               self.chemorder == other.chemorder and (self.pos is other.pos or np.allclose(self.pos, other.pos))
 
     def __ne__(self, other):
         """Inequality == not __eq__"""
@@ -119,12 +167,27 @@ class Supercell(object):
         str += self.stoichiometry()
         str += '\nKroger-Vink: ' + self.KrogerVink()
         str += '\nPositions:\n'
-        str += '\n'.join([u.__str__() + ' ' + self.chemistry[o] for u, o in zip(self.pos, self.occ)])
+        str += '\n'.join([u + ' ' + self.chemistry[o] for u, o in zip(self._posstrings(self.pos), self.occ)])
         str += '\nOrdering:\n'
-        str += '\n'.join([u.__str__() + ' ' + c for c, ulist in zip(self.chemistry, self.occposlist())
-                          for u in ulist])
+        orderpos = self.pos[[ind for clist in self.chemorder for ind in clist]]
+        str += '\n'.join([u + ' ' + c for u, c in zip(self._posstrings(orderpos),
+                                                      [c for c, clist in zip(self.chemistry, self.chemorder)
+                                                       for ind in clist])])
         return str
 
+    @staticmethod
+    def _posstrings(posarray):
+        """
+        Format each row of an array of positions, all with one call to the numpy formatter.
+
+        :param posarray: array [N, 3] of positions
+        :return posstrings: list of N strings, one per position
+        """
+        if len(posarray) == 0: return []
+        # strip the outer brackets, leaving one bracketed row per line
+        return [line.strip() for line in
+                np.array2string(posarray, threshold=np.inf, max_line_width=np.inf)[1:-1].splitlines()]
+
     def __mul__(self, other):
         """
         Multiply by a GroupOp; returns a new supercell (constructed via copy).
@@ -173,12 +236,11 @@ class Supercell(object):
         :param threshold: (optional) minimum squared "distance" in supercell for a match; default=1.
         :return index: index of closest position
         """
-        index, dist2 = None, threshold
-        for ind, u in enumerate(self.pos):
-            delta = crystal.inhalf(pos - u)
-            d2 = np.sum(delta * delta)
-            if d2 < dist2: index, dist2 = ind, d2
-        return index
+        # periodic displacement to every site at once; argmin gives the first of the closest sites
+        delta = crystal.inhalf(pos - self.pos)
+        d2 = np.sum(delta * delta, axis=1)
+        index = int(np.argmin(d2))
+        return index if d2[index] < threshold else None
 
     def __getitem__(self, key):
         """
@@ -228,39 +290,69 @@ class Supercell(object):
         :param super: 3x3 integer matrix
         :return size: integer, corresponding to number of unit cells
         :return invsuper: integer matrix inverse of supercell (needs to be divided by size)
-        :return translist: list of integer vectors (to be divided by ``size``) corresponding
-            to unit cell positions
+        :return translist: array [size, 3] of integer vectors (to be divided by ``size``) corresponding
+            to unit cell positions; read-only, as it is shared between supercells
         :return transdict: dictionary of tuples and their corresponding index (inverse of trans)
         """
-        size = abs(int(np.round(np.linalg.det(super))))
-        if size==0: raise ZeroDivisionError('Tried to use a singular supercell.')
-        invsuper = np.round(np.linalg.inv(super) * size).astype(int)
-        maxN = abs(super).max()
-        translist, transdict = [], {}
-        for nvect in [np.array((n0, n1, n2))
-                      for n0 in range(-maxN, maxN + 1)
-                      for n1 in range(-maxN, maxN + 1)
-                      for n2 in range(-maxN, maxN + 1)]:
-            tv = np.dot(invsuper, nvect) % size
-            ttup = tuple(tv)
-            if ttup not in transdict:
-                transdict[ttup] = len(translist)
-                translist.append(tv)
-        if len(translist) != size:
-            raise ArithmeticError(
-                'Somehow did not generate the correct number of translations? {}!={}'.format(size, len(translist)))
-        return size, invsuper, translist, transdict
-
-    def makesites(self):
+        transkey = np.array(super, dtype=int).tobytes()
+        trans = _TRANSCACHE.get(transkey)
+        if trans is None:
+            # exact integer determinant and adjugate: size*inv(super) = sign(det)*adj(super)
+            superint = np.round(super).astype(int)
+            det = int(crystal._det(superint))
+            size = abs(det)
+            if size==0: raise ZeroDivisionError('Tried to use a singular supercell.')
+            invsuper = crystal._adj(superint) if det > 0 else -crystal._adj(superint)
+            maxN = abs(super).max()
+            # all lattice vectors in the cube [-maxN, maxN]^3 (in the same order as the nested loops
+            # n0, n1, n2), mapped into the supercell at once; we keep the first occurrence of each
+            nrange = np.arange(-maxN, maxN + 1)
+            nvectlist = np.stack(np.meshgrid(nrange, nrange, nrange, indexing='ij'), axis=-1).reshape(-1, 3)
+            tvlist = np.dot(nvectlist, invsuper.T) % size
+            first = np.unique(tvlist, axis=0, return_index=True)[1]
+            transarray = tvlist[np.sort(first)]
+            if len(transarray) != size:
+                raise ArithmeticError(
+                    'Somehow did not generate the correct number of translations? {}!={}'.format(size, len(transarray)))
+            # the translation vectors are shared between every supercell with this super, so read-only
+            transarray.flags.writeable = False
+            trans = (size, invsuper, transarray, {tuple(tv): n for n, tv in enumerate(transarray)})
+            _TRANSCACHE[transkey] = trans
+            if len(_TRANSCACHE) > _TRANSCACHE_SIZE: _TRANSCACHE.popitem(last=False)
+        else:
+            _TRANSCACHE.move_to_end(transkey)
+        size, invsuper, translist, transdict = trans
+        return size, invsuper.copy(), translist, dict(transdict)
+
+    def transindex(self, tv):
+        """
+        Return the index into translist of a translation (or of an array of translations); does the
+        same job as transdict, but with the translations reduced mod size and looked up all at once.
+
+        :param tv: integer vector (to be divided by ``size``) of a translation, or array [M, 3] of them
+        :return index: integer index into translist, or array [M] of indices
+        :raises KeyError: if a translation is not one of the supercell translations (as transdict would)
+        """
+        keys = np.dot(np.asarray(tv) % self.size, self.transcode)
+        pos = np.minimum(np.searchsorted(self.transkeys, keys), len(self.transkeys) - 1)
+        if not np.all(self.transkeys[pos] == keys):
+            raise KeyError('Translation {} is not in the supercell translations'.format(tv))
+        return self.transorder[pos]
+
+    def makesites(self, dtype=float):
         """
         Generate the array corresponding to the sites; the indexing is based on the translations
         and the atomindices in crys. These may not all be filled when the supercell is finished.
 
+        :param dtype: (optional) floating point type of the positions; default=float
         :return pos: array [N*size, 3] of supercell positions in direct coordinates
         """
-        invsize = 1 / self.size
-        basislist = [np.dot(self.invsuper, self.crys.basis[c][i]) for (c, i) in self.atomindices]
-        return np.array([crystal.incell((t + u) * invsize) for t in self.translist for u in basislist])
+        # basis (in atomindices order) and translations, each scaled into supercell coordinates on
+        # its own; then every translation plus every basis site, with the translations as the outer index
+        basisarray = np.dot(np.concatenate(self.crys.basisarrays()), self.invsuperfrac.T)
+        translations = self.translist * (1 / self.size)
+        return crystal.incell((translations[:, np.newaxis, :] +
+                               basisarray[np.newaxis, :, :]).reshape(-1, 3)).astype(dtype, copy=False)
 
     def gengroup(self):
         """
@@ -269,10 +361,22 @@ class Supercell(object):
         :return G: set of GroupOps
         """
         Glist = []
-        unittranslist = [np.dot(self.super, t) // self.size for t in self.translist]
+        unittransarray = np.dot(self.translist, self.super.T) // self.size
         invsize = 1 / self.size
-        for g0 in self.crys.G:
-            Rsuper = np.dot(self.invsuper, np.dot(g0.rot, self.super))
+        # where every group operation of the crystal sends every site in every unit cell of the
+        # supercell: the lattice vectors Rp, array [Ng, size, N, 3], and site indices, array [Ng, N]
+        # (both in the order of iteration over self.crys.G, with sites in the order of atomindices)
+        Rplist, indlist = [], []
+        for (c, i) in self.atomindices:
+            Rp, gi = self.crys.g_pos_all(unittransarray, (c, i))
+            Rplist.append(Rp)
+            indlist.append([self.indexatom[(c, j)] for j in gi])
+        Rparray, indarray = np.stack(Rplist, axis=2), np.array(indlist).T
+        # the translations that correspond to each unit cell translation u, in [n]^-1 units:
+        unitsuperarray = np.dot(unittransarray, self.invsuper.T)
+        # the rotations of every group operation in the supercell, [n]^-1 g0.rot [n], as one stacked product
+        Rsuperarray = self.invsuper @ np.array([g0.rot for g0 in self.crys.G]) @ self.super
+        for g0, Rsuper, Rp, ind in zip(self.crys.G, Rsuperarray, Rparray, indarray):
             if not np.all(Rsuper % self.size == 0):
                 warnings.warn(
                     'Broken symmetry? GroupOp:\n{}\nnot a symmetry operation of supercell?\nRsuper=\n{}'.format(g0,
@@ -282,26 +386,23 @@ class Supercell(object):
             else:
                 # divide out the size (in inverse super). Should still be an integer matrix (and hence, a symmetry)
                 Rsuper //= self.size
-            for u in unittranslist:
-                # first, make the corresponding group operation by adding the unit cell translation:
-                g = g0 + u
+            # indexmap for every unit cell translation u added to g0 at once (one row per u):
+            # A little confusing, but:
+            # [n]^-1*(Rp+u) -> translation, but needs to be mod self.size; look up the index of each
+            # translation, THEN multiply by self.N, and add the index of the new Wyckoff site. Whew!
+            Rpsuper = np.dot(Rp, self.invsuper.T)
+            indexmaps = self.transindex(Rpsuper[np.newaxis, :, :, :] +
+                                        unitsuperarray[:, np.newaxis, np.newaxis, :]) * self.N + ind
+            indexmaps = indexmaps.reshape(self.size, self.N * self.size)
+            for u, indexmap in zip(unittransarray, indexmaps):
+                # the group operation with the unit cell translation added: g = g0 + u
+                gtrans = g0.trans + u
                 # translation vector *in the supercell*; go ahead and keep it inside the supercell, too.
-                tsuper = (np.dot(self.invsuper, g.trans) % self.size) * invsize
-                # finally: indexmap!!
-                indexmap = []
-                for R in unittranslist:
-                    for ci in self.atomindices:
-                        Rp, ci1 = self.crys.g_pos(g, R, ci)
-                        # A little confusing, but:
-                        # [n]^-1*Rp -> translation, but needs to be mod self.size
-                        # convert to a tuple, to the index into transdict
-                        # THEN multiply by self.N, and add the index of the new Wyckoff site. Whew!
-                        indexmap.append(
-                            self.transdict[tuple(np.dot(self.invsuper, Rp) % self.size)] * self.N + self.indexatom[ci1])
-                if len(set(indexmap)) != self.N * self.size:
-                    raise ArithmeticError('Did not produce a correct index mapping for GroupOp:\n{}'.format(g))
+                tsuper = (np.dot(self.invsuper, gtrans) % self.size) * invsize
+                if len(set(indexmap.tolist())) != self.N * self.size:
+                    raise ArithmeticError('Did not produce a correct index mapping for GroupOp:\n{}'.format(g0 + u))
                 Glist.append(crystal.GroupOp(rot=Rsuper, cartrot=g0.cartrot, trans=tsuper,
-                                             indexmap=(tuple(indexmap),)))
+                                             indexmap=(tuple(indexmap.tolist()),)))
         return frozenset(Glist)
 
     def definesolute(self, c, chemistry):
@@ -8,24 +8,82 @@ __author__ = 'Dallas R. Trinkle'
 
 import unittest
 import textwrap, itertools, types
-import logging, inspect
+import logging, inspect, os
 import numpy as np
 import onsager.OnsagerCalc as OnsagerCalc
 import onsager.crystal as crystal
 
-# uncomment for verbosity:
-# logging.basicConfig(level=logging.DEBUG)  # VERBOSE
+# set ONSAGER_TEST_VERBOSE=1 in the environment for verbosity; otherwise, all of the (expensive)
+# formatting of diffusers and Onsager coefficients is skipped behind isEnabledFor checks
+if bool(int(os.environ.get('ONSAGER_TEST_VERBOSE', '0'))):
+    logging.basicConfig(level=logging.DEBUG)  # VERBOSE
+
+
+# 7(1-F) = (10 b^4 + 180.3 b^3 + 924.3 b^2 + 1338.1 b)/ (2 b^4 + 40.1 b^3 + 253.3 b^2 + 596 b + 435.3)
+# polynomial coefficients of the numerator and denominator, highest power first (for np.polyval)
+FIVEFREQ_NUM = np.array([10., 180.3, 924.3, 1338.1, 0.])
+FIVEFREQ_DEN = np.array([2., 40.1, 253.3, 596., 435.3])
+
+# Arrhenius constants shared by the interstitial tests: exp(-LOG2) = 1/2, exp(-LOG10) = 1/10
+LOG2 = np.log(2.)
+LOG10 = np.log(10.)
+
+# identity matrices for the elastodiffusion tests (read-only, as they are shared)
+I3 = np.eye(3)
+I6 = np.eye(6)
+I3.flags.writeable = False
+I6.flags.writeable = False
+# the 6 unit Voigt strains, as a [6, 3, 3] stack of strain matrices
+VOIGT_BASIS = np.array([crystal.Voigtstrain(*s) for s in I6])
+VOIGT_BASIS.flags.writeable = False
+
+
+def transdipole(dx, perp, para):
+    """Uniaxial transition-state dipole perp I + (para-perp) u u along u = dx/|dx|; dx can be a stack [..., 3]"""
+    u = dx / np.sqrt(np.einsum('...i,...i', dx, dx))[..., np.newaxis]
+    return perp * I3 + (para - perp) * u[..., :, np.newaxis] * u[..., np.newaxis, :]
 
 
 def fivefreq(w0, w1, w2, w3, w4):
     """The solute/solute diffusion coefficient in the 5-freq. model"""
     b = w4 / w0
-    # 7(1-F) = (10 b^4 + 180.3 b^3 + 924.3 b^2 + 1338.1 b)/ (2 b^4 + 40.1 b^3 + 253/3 b^2 + 596 b + 435.3)
-    F7 = 7. - b * (1338.1 + b * (924.3 + b * (180.3 + b * 10.))) / \
-              (435.3 + b * (596. + b * (253.3 + b * (40.1 + b * 2.))))
+    F7 = 7. - np.polyval(FIVEFREQ_NUM, b) / np.polyval(FIVEFREQ_DEN, b)
     p = w4 / w3
     return p * w2 * (2. * w1 + w3 * F7) / (2. * w2 + 2. * w1 + w3 * F7)
 
+
+def inv3(M):
+    """Inverse of a 3x3 matrix from its cofactors: row i of the cofactor matrix is M[i+1] x M[i+2]"""
+    cof = np.cross(M[[1, 2, 0]], M[[2, 0, 1]])
+    return cof.T / np.dot(M[0], cof[0])
+
+
+def solve3(D, DE):
+    """Solve D.X = DE for a 3x3 D with the cofactor inverse (no tolerance-based shortcut for diagonal D)"""
+    return np.dot(inv3(D), DE)
+
+
+def isisotropic(L, rtol=1e-5, atol=1e-8):
+    """True if L is (to np.allclose tolerances) L[0,0] times the identity; checks the elements directly"""
+    Ldiag = np.diagonal(L)
+    tol = atol + rtol * abs(L[0, 0])
+    return np.abs(L - np.diag(Ldiag)).max() <= atol and np.abs(Ldiag - L[0, 0]).max() <= tol
+
+
+def jumparray(jumplist):
+    """Structured array of a list of ((i, j), dx) jumps, with fields 'ij' and 'dx' (so jumps['dx'] is [Njumps, dim])"""
+    jumplist = list(jumplist)
+    dim = len(jumplist[0][1])
+    return np.array([(ij, dx) for ij, dx in jumplist], dtype=[('ij', int, 2), ('dx', float, dim)])
+
+
+def tracerL0vv(om0, dxlist):
+    """Uncorrelated vacancy transport coefficient, 1/2 om0 sum_jumps dx dx, from the stacked jumps dxlist"""
+    L0vv = np.dot(dxlist.T, dxlist)
+    L0vv *= 0.5 * om0  # scale in place: the product is the only [dim, dim] array we allocate
+    return L0vv
+
+
 class DiffusionTestCase(unittest.TestCase):
     """Base class to define some diffusion-based assertions--contains no tests"""
 
@@ -56,8 +114,12 @@ class DiffusionTestCase(unittest.TestCase):
                                diffuserargs2=types.MappingProxyType({})):
         """Assert that two diffusers give equal values over the same kT set"""
         for kT in kTlist:
-            Lvv1, Lss1, Lsv1, L1vv1 = diffuser1.Lij(*diffuser1.preene2betafree(kT, **tdict1), **diffuserargs1)
-            Lvv2, Lss2, Lsv2, L1vv2 = diffuser2.Lij(*diffuser2.preene2betafree(kT, **tdict2), **diffuserargs2)
+            # we often compare a diffuser against itself (with different arguments): convert only once then
+            betafree1 = diffuser1.preene2betafree(kT, **tdict1)
+            betafree2 = betafree1 if (diffuser2 is diffuser1 and tdict2 is tdict1) else \
+                diffuser2.preene2betafree(kT, **tdict2)
+            Lvv1, Lss1, Lsv1, L1vv1 = diffuser1.Lij(*betafree1, **diffuserargs1)
+            Lvv2, Lss2, Lsv2, L1vv2 = diffuser2.Lij(*betafree2, **diffuserargs2)
             if hasattr(self, 'logger') and self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug('kT={}'.format(kT))
                 self.logger.debug('\n{}\n{}'.format(diffuser1, diffuserargs1))
@@ -89,15 +151,30 @@ class CrystalOnsagerTestsSC(DiffusionTestCase):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal(self.a0 * np.eye(3), [np.zeros(3)])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 1.01 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Simple Cubic a0={}'.format(self.a0)
-        self.correl = 0.653109  # 0.653
-        self.tol = 1e-6
+    # each crystal is described by class attributes (and built by _build_crys), so that subclasses only
+    # give their parameters, and setUpClass and setUp are shared; cutoff is the jump cutoff distance in units of a0
+    a0 = 1.
+    chem = 0
+    cutoff = 1.01
+    crystalname = 'Simple Cubic a0=1.0'
+    correl = 0.653109  # 0.653
+    tol = 1e-6
+    NGFmax = 4
+
+    @classmethod
+    def _build_crys(cls):
+        """Construct the crystal for the class; called once, from setUpClass"""
+        return crystal.Crystal(cls.a0 * np.eye(3), [np.zeros(3)])
+
+    @classmethod
+    def setUpClass(cls):
+        # the tests only read the crystal, its jump network, and the calculator (the most expensive
+        # part of the tests) built from them, so we construct them once for the class
+        cls.crys = cls._build_crys()
+        cls.jumpnetwork = cls.crys.jumpnetwork(cls.chem, cls.cutoff * cls.a0)
+        cls.sitelist = cls.crys.sitelist(cls.chem)
+        cls.Diffusivity = OnsagerCalc.VacancyMediated(cls.crys, cls.chem, cls.sitelist, cls.jumpnetwork,
+                                                      1, cls.NGFmax)
 
     def assertOrderingSuperEqual(self, s0, s1, msg=""):
         if s0 != s1:
@@ -115,17 +192,12 @@ class CrystalOnsagerTestsSC(DiffusionTestCase):
                                         self.__class__.__name__ + '.' +
                                         inspect.currentframe().f_code.co_name)
         kT = 1.
-        NGFmax = getattr(self, 'NGFmax', 4)
-        Diffusivity = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork,
-                                                  1, NGFmax)
+        Diffusivity = self.Diffusivity
         thermaldef = self.makeunitythermodict(Diffusivity)
 
-        dim = self.crys.dim
-        L0vv = np.zeros((dim, dim))
         om0 = thermaldef['preT0'][0] / thermaldef['preV'][0] * \
               np.exp((thermaldef['eneV'][0] - thermaldef['eneT0'][0]) / kT)
-        for (i, j), dx in self.jumpnetwork[0]:
-            L0vv += 0.5 * np.outer(dx, dx) * om0
+        L0vv = tracerL0vv(om0, jumparray(self.jumpnetwork[0])['dx'])
         L0vv /= len(self.crys.basis[self.chem])
         Lvv, Lss, Lsv, L1vv = Diffusivity.Lij(*Diffusivity.preene2betafree(kT, **thermaldef))
 
@@ -134,7 +206,7 @@ class CrystalOnsagerTestsSC(DiffusionTestCase):
             for Lname in ('Lvv', 'Lss', 'Lsv', 'L1vv'):
                 self.logger.debug('{}:\n{}'.format(Lname, locals()[Lname]))
         for L in [Lvv, Lss, Lsv, L1vv]:
-            self.assertTrue(np.allclose(L, L[0, 0] * np.eye(dim)), msg='Diffusivity not isotropic?')
+            self.assertTrue(isisotropic(L), msg='Diffusivity not isotropic?')
         # No solute drag, so Lsv = -Lvv; Lvv = normal vacancy diffusion
         # all correlation is in that geometric prefactor of Lss.
         self.assertTrue(np.allclose(Lvv, L0vv))
@@ -153,15 +225,13 @@ class CrystalOnsagerTestsFCC(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal.FCC(self.a0)
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.8 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Face-Centered Cubic a0={}'.format(self.a0)
-        self.correl = 0.78145142
-        self.tol = 1e-6
+    cutoff = 0.8
+    crystalname = 'Face-Centered Cubic a0=1.0'
+    correl = 0.78145142
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal.FCC(cls.a0)
 
     @staticmethod
     def makethermodict(w0, w1, w2, w3, w4):
@@ -189,13 +259,11 @@ class CrystalOnsagerTestsFCC(CrystalOnsagerTestsSC):
         w3 = 0.5 * w0  # dissociation jump (vacancy away from solute)
         w4 = 1.5 * w0  # association jump (vacancy jump into solute)
         SVprob = w4 / w3  # enhanced probability of solute-vacancy complex
-        Diffusivity = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
+        Diffusivity = self.Diffusivity
         thermaldef = Diffusivity.tags2preene(self.makethermodict(w0, w1, w2, w3, w4))
-        L0vv = np.zeros((3, 3))
         om0 = thermaldef['preT0'][0] / thermaldef['preV'][0] * \
               np.exp((thermaldef['eneV'][0] - thermaldef['eneT0'][0]) / kT)
-        for (i, j), dx in self.jumpnetwork[0]:
-            L0vv += 0.5 * np.outer(dx, dx) * om0
+        L0vv = tracerL0vv(om0, jumparray(self.jumpnetwork[0])['dx'])
         L0vv /= self.crys.N
         Lvv, Lss, Lsv, L1vv = Diffusivity.Lij(*Diffusivity.preene2betafree(kT, **thermaldef))
         if self.logger.isEnabledFor(logging.DEBUG):
@@ -210,7 +278,7 @@ class CrystalOnsagerTestsFCC(CrystalOnsagerTestsSC):
             for Lname in ('Lvv', 'Lss', 'Lsv', 'L1vv'):
                 self.logger.debug('{}:\n{}'.format(Lname, locals()[Lname]))
         for L in [Lvv, Lss, Lsv, L1vv]:
-            self.assertTrue(np.allclose(L, L[0, 0] * np.eye(3)), msg='Diffusivity not isotropic?')
+            self.assertTrue(isisotropic(L), msg='Diffusivity not isotropic?')
         self.assertTrue(np.allclose(Lvv, L0vv))
         Ds5freq = self.a0 ** 2 * fivefreq(w0, w1, w2, w3, w4)
         self.assertAlmostEqual(Lss[0, 0], Ds5freq, delta=1e-3,
@@ -236,14 +304,12 @@ class CrystalOnsagerTestsFCC(CrystalOnsagerTestsSC):
         w3 = 1e-8*w0  # dissociation jump (vacancy away from solute)
         w4 = w0  # association jump (vacancy jump into solute)
         SVprob = w4 / w3  # enhanced probability of solute-vacancy complex
-        Diffusivity = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
+        Diffusivity = self.Diffusivity
         # updated to use tagging to do our work for us:
         thermaldef = Diffusivity.tags2preene(self.makethermodict(w0, w1, w2, w3, w4))
-        L0vv = np.zeros((3, 3))
         om0 = thermaldef['preT0'][0] / thermaldef['preV'][0] * \
               np.exp((thermaldef['eneV'][0] - thermaldef['eneT0'][0]) / kT)
-        for (i, j), dx in self.jumpnetwork[0]:
-            L0vv += 0.5 * np.outer(dx, dx) * om0
+        L0vv = tracerL0vv(om0, jumparray(self.jumpnetwork[0])['dx'])
         L0vv /= self.crys.N
         Lvv, Lss, Lsv, L1vv = Diffusivity.Lij(*Diffusivity.preene2betafree(kT, **thermaldef), large_om2=0)
 
@@ -259,7 +325,7 @@ class CrystalOnsagerTestsFCC(CrystalOnsagerTestsSC):
             for Lname in ('Lvv', 'Lss', 'Lsv', 'L1vv'):
                 self.logger.debug('{}:\n{}'.format(Lname, locals()[Lname]))
         for L in [Lvv, Lss, Lsv, L1vv]:
-            self.assertTrue(np.allclose(L, L[0, 0] * np.eye(3)), msg='Diffusivity not isotropic?')
+            self.assertTrue(isisotropic(L), msg='Diffusivity not isotropic?')
         self.assertTrue(np.allclose(Lvv, L0vv))
         Ds5freq = self.a0 ** 2 * fivefreq(w0, w1, w2, w3, w4)
         self.assertAlmostEqual(Lss[0, 0], Ds5freq, delta=1e-6*Ds5freq,
@@ -279,15 +345,13 @@ class CrystalOnsagerTestsBCC(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal.BCC(self.a0)
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.87 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Body-Centered Cubic a0={}'.format(self.a0)
-        self.correl = 0.727194  # 0.727
-        self.tol = 1e-6
+    cutoff = 0.87
+    crystalname = 'Body-Centered Cubic a0=1.0'
+    correl = 0.727194  # 0.727
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal.BCC(cls.a0)
 
 
 class CrystalOnsagerTestsDiamond(CrystalOnsagerTestsSC):
@@ -295,17 +359,16 @@ class CrystalOnsagerTestsDiamond(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 2.
-        self.crys = crystal.Crystal(self.a0 * np.array([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]]),
-                                    [np.array([-0.125, -0.125, -0.125]),
-                                     np.array([0.125, 0.125, 0.125])])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.45 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Diamond Cubic a0={}'.format(self.a0)
-        self.correl = 0.5
-        self.tol = 1e-6
+    a0 = 2.
+    cutoff = 0.45
+    crystalname = 'Diamond Cubic a0=2.0'
+    correl = 0.5
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal(cls.a0 * np.array([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]]),
+                               np.array([[-0.125, -0.125, -0.125],
+                                         [0.125, 0.125, 0.125]]))
 
 
 class CrystalOnsagerTestsSquare(CrystalOnsagerTestsSC):
@@ -313,16 +376,15 @@ class CrystalOnsagerTestsSquare(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 2.
-        self.crys = crystal.Crystal(self.a0 * np.eye(2), [np.zeros(2)])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 1.01 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Square a0={}'.format(self.a0)
-        # self.correl = 0.46705  # doi://10.1039/TF9565200786
-        self.correl = 1/(np.pi-1)  # doi://10.1002/352760264X.ch3
-        self.tol = 1e-6
+    a0 = 2.
+    cutoff = 1.01
+    crystalname = 'Square a0=2.0'
+    # correl = 0.46705  # doi://10.1039/TF9565200786
+    correl = 1/(np.pi-1)  # doi://10.1002/352760264X.ch3
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal(cls.a0 * np.eye(2), [np.zeros(2)])
 
 
 class CrystalOnsagerTestsTria(CrystalOnsagerTestsSC):
@@ -330,17 +392,17 @@ class CrystalOnsagerTestsTria(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 2.
-        self.crys = crystal.Crystal(self.a0 * np.array([[1/2,1/2],
-                                                        [-np.sqrt(3/4),np.sqrt(3/4)]]),
-                                    [np.zeros(2)])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 1.01 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Triangle a0={}'.format(self.a0)
-        self.correl = 0.56006  # doi://10.1039/TF9565200786
-        self.tol = 1e-5
+    a0 = 2.
+    cutoff = 1.01
+    crystalname = 'Triangle a0=2.0'
+    correl = 0.56006  # doi://10.1039/TF9565200786
+    tol = 1e-5
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal(cls.a0 * np.array([[1/2,1/2],
+                                                  [-np.sqrt(3/4),np.sqrt(3/4)]]),
+                               [np.zeros(2)])
 
 
 class CrystalOnsagerTestsHoneycomb(CrystalOnsagerTestsSC):
@@ -348,17 +410,16 @@ class CrystalOnsagerTestsHoneycomb(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 2.
-        self.crys = crystal.Crystal(self.a0 * np.array([[1/2,1/2],
-                                                        [-np.sqrt(3/4),np.sqrt(3/4)]]),
-                                    [np.array([2/3,1/3]), np.array([1/3,2/3])])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.6 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Honeycomb a0={}'.format(self.a0)
-        self.correl = 1/3  # doi://10.1039/TF9565200786
-        self.tol = 1e-6
+    a0 = 2.
+    cutoff = 0.6
+    crystalname = 'Honeycomb a0=2.0'
+    correl = 1/3  # doi://10.1039/TF9565200786
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal(cls.a0 * np.array([[1/2,1/2],
+                                                  [-np.sqrt(3/4),np.sqrt(3/4)]]),
+                               [np.array([2/3,1/3]), np.array([1/3,2/3])])
 
 
 class CrystalOnsagerTestsGarnet(CrystalOnsagerTestsSC):
@@ -366,23 +427,23 @@ class CrystalOnsagerTestsGarnet(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        alatt = self.a0 * np.array([[-0.5, 0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, -0.5]])
-        invlatt = np.array([[0, 1, 1], [1, 0, 1], [1, 1, 0]])
-        uMg = ((1 / 8, 0, 1 / 4), (3 / 8, 0, 3 / 4), (1 / 4, 1 / 8, 0), (3 / 4, 3 / 8, 0),
-               (0, 1 / 4, 1 / 8), (0, 3 / 4, 3 / 8), (7 / 8, 0, 3 / 4), (5 / 8, 0, 1 / 4),
-               (3 / 4, 7 / 8, 0), (1 / 4, 5 / 8, 0), (0, 3 / 4, 7 / 8), (0, 1 / 4, 5 / 8))
-        tovec = lambda x: np.dot(invlatt, x)
-        # this is a reduced version of pyrope: just the Mg (24c sites in 230)
-        self.crys = crystal.Crystal(alatt, [[vec(w) for w in uMg for vec in (tovec,)]], ['Mg'])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.31 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Garnet (24c site only) a0={}'.format(self.a0)
-        self.correl = 0.374973  # not quite 0.375
-        self.tol = 1e-6
-        self.NGFmax = 4  # can override with, e.g., 6, but changes value by ~1e-8
+    a0 = 1.
+    cutoff = 0.31
+    crystalname = 'Garnet (24c site only) a0=1.0'
+    correl = 0.374973  # not quite 0.375
+    NGFmax = 4  # can override with, e.g., 6, but changes value by ~1e-8
+
+    @classmethod
+    def _build_crys(cls):
+        # this is a reduced version of pyrope: just the Mg (24c sites in 230), given in the cubic cell
+        # and converted to the bcc primitive cell with invlatt = [[0, 1, 1], [1, 0, 1], [1, 1, 0]]
+        return crystal.Crystal(cls.a0 * np.array([[-0.5, 0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, -0.5]]),
+                               [np.dot(np.array([(1 / 8, 0, 1 / 4), (3 / 8, 0, 3 / 4), (1 / 4, 1 / 8, 0),
+                                                 (3 / 4, 3 / 8, 0), (0, 1 / 4, 1 / 8), (0, 3 / 4, 3 / 8),
+                                                 (7 / 8, 0, 3 / 4), (5 / 8, 0, 1 / 4), (3 / 4, 7 / 8, 0),
+                                                 (1 / 4, 5 / 8, 0), (0, 3 / 4, 7 / 8), (0, 1 / 4, 5 / 8)]),
+                                       np.array([[0, 1, 1], [1, 0, 1], [1, 1, 0]]))],
+                               ['Mg'])
 
 
 class CrystalOnsagerTestsNbO(CrystalOnsagerTestsSC):
@@ -390,18 +451,18 @@ class CrystalOnsagerTestsNbO(CrystalOnsagerTestsSC):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal(self.a0 * np.eye(3),
-                                    [[np.array([0, 0.5, 0.5]), np.array([0.5, 0, 0.5]), np.array([0.5, 0.5, 0])],
-                                     [np.array([0.5, 0, 0]), np.array([0, 0.5, 0]), np.array([0, 0, 0.5])]],
-                                    ['Nb', 'O'])
-        self.chem = 1  # do on the oxygen sublattice, though it works on Nb too
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.80 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'NbO (oxygen sublattice) a0={}'.format(self.a0)
-        self.correl = 0.688916  # doi://10.1080/01418618308234882  (Koiwa & Ishioka paper)
-        self.tol = 1e-6
+    a0 = 1.
+    chem = 1  # do on the oxygen sublattice, though it works on Nb too
+    cutoff = 0.80
+    crystalname = 'NbO (oxygen sublattice) a0=1.0'
+    correl = 0.688916  # doi://10.1080/01418618308234882  (Koiwa & Ishioka paper)
+
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal(cls.a0 * np.eye(3),
+                               [np.array([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]]),
+                                np.array([[0.5, 0, 0], [0, 0.5, 0], [0, 0, 0.5]])],
+                               ['Nb', 'O'])
 
 
 class CrystalOnsagerTestsHCP(DiffusionTestCase):
@@ -409,19 +470,25 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal.HCP(1.)
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 1.01 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Hexagonal Closed-Packed a0={} c0=sqrt(8/3)'.format(self.a0)
-        # Correlation factors from doi://10.1080/01418617808239187
-        # S. Ishioka and M. Koiwa, Phil. Mag. A 37, 517-533 (1978)
-        # which they say matches older results in K. Compaan and C. Haven,
-        # Trans. Faraday Soc. 52, 786 (1958) and ibid. 54, 1498
-        self.correlx = 0.78120489
-        self.correlz = 0.78145142
+    a0 = 1.
+    chem = 0
+    cutoff = 1.01
+    crystalname = 'Hexagonal Closed-Packed a0=1.0 c0=sqrt(8/3)'
+    # Correlation factors from doi://10.1080/01418617808239187
+    # S. Ishioka and M. Koiwa, Phil. Mag. A 37, 517-533 (1978)
+    # which they say matches older results in K. Compaan and C. Haven,
+    # Trans. Faraday Soc. 52, 786 (1958) and ibid. 54, 1498
+    correlx = 0.78120489
+    correlz = 0.78145142
+
+    @classmethod
+    def setUpClass(cls):
+        # the tests only read the crystal, its jump network, and the calculator built from them
+        # (testSupercell builds its own, with a renamed chemistry), so we construct them once for the class
+        cls.crys = crystal.Crystal.HCP(cls.a0)
+        cls.jumpnetwork = cls.crys.jumpnetwork(cls.chem, cls.cutoff * cls.a0)
+        cls.sitelist = cls.crys.sitelist(cls.chem)
+        cls.Diffusivity = OnsagerCalc.VacancyMediated(cls.crys, cls.chem, cls.sitelist, cls.jumpnetwork, 1)
 
     def testtracer(self):
         """Test that HCP tracer works as expected"""
@@ -430,14 +497,12 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
                                         inspect.currentframe().f_code.co_name)
         # Make a calculator with one neighbor shell
         kT = 1.
-        Diffusivity = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
+        Diffusivity = self.Diffusivity
         thermaldef = self.makeunitythermodict(Diffusivity)
-        L0vv = np.zeros((3, 3))
         om0 = thermaldef['preT0'][0] / thermaldef['preV'][0] * \
               np.exp((thermaldef['eneV'][0] - thermaldef['eneT0'][0]) / kT)
-        for jumplist in self.jumpnetwork:
-            for (i, j), dx in jumplist:
-                L0vv += 0.5 * np.outer(dx, dx) * om0
+        # every jump in every list of the network contributes:
+        L0vv = tracerL0vv(om0, jumparray(itertools.chain.from_iterable(self.jumpnetwork))['dx'])
         L0vv /= self.crys.N
         Lvv, Lss, Lsv, L1vv = Diffusivity.Lij(*Diffusivity.preene2betafree(kT, **thermaldef))
 
@@ -447,8 +512,7 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
                 self.logger.debug('{}:\n{}'.format(Lname, locals()[Lname]))
         # we leave out Lss since it is not, in fact, isotropic!
         for L in [Lvv, Lsv, L1vv]:
-            self.assertTrue(np.allclose(L, L[0, 0] * np.eye(3), atol=1e-8),
-                            msg='Diffusivity not isotropic?')
+            self.assertTrue(isisotropic(L), msg='Diffusivity not isotropic?')
         # No solute drag, so Lsv = -Lvv; Lvv = normal vacancy diffusion
         # all correlation is in that geometric prefactor of Lss.
         self.assertTrue(np.allclose(Lvv, L0vv))
@@ -469,7 +533,7 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
                                         inspect.currentframe().f_code.co_name)
         # Make a calculator with one neighbor shell
         kT = 1.
-        Diffusivity = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
+        Diffusivity = self.Diffusivity
         thermaldef = self.makeunitythermodict(Diffusivity)
         thermaldef['preT2'] = 1e16*thermaldef['preT2']
         Lvv, Lss, Lsv, L1vv = Diffusivity.Lij(*Diffusivity.preene2betafree(kT, **thermaldef))
@@ -488,8 +552,9 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
 
     def testSupercell(self):
         """Can we construct proper supercells for our diffuser?"""
-        self.crys.chemistry[self.chem] = 'M'  # metal matrix
-        diffuser = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
+        crys = crystal.Crystal.HCP(self.a0, chemistry=['M'])  # metal matrix
+        diffuser = OnsagerCalc.VacancyMediated(crys, self.chem, crys.sitelist(self.chem),
+                                               crys.jumpnetwork(self.chem, self.cutoff * self.a0), 1)
         # do we successfully raise a Warning about small cells?
         for n in range(1, 5):
             # everything up to a 5x5x3 cell is too small! Should provide a runtime warning
@@ -497,7 +562,7 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
                 diffuser.makesupercells(n * np.eye(3, dtype=int))
         super_n = np.array([[5, 0, 0], [0, 5, 0], [0, 0, 3]])
         supercelldict = diffuser.makesupercells(super_n)
-        basis = self.crys.basis[diffuser.chem]
+        basis = crys.basis[diffuser.chem]
         for key in ('states', 'transitions', 'transmapping', 'indices'):
             self.assertIn(key, supercelldict)
             self.assertGreaterEqual(len(supercelldict[key]), 1, msg='{} empty?'.format(key))
@@ -512,8 +577,8 @@ class CrystalOnsagerTestsHCP(DiffusionTestCase):
         self.assertEqual(len(supercelldict['transitions']),
                          len(diffuser.om0_jn) + len(diffuser.om1_jn) + len(diffuser.om2_jn))
         # check that *every* supercell only has one or two defects in it (one solute, one vacancy):
-        vacdef, soldef = 'v_{}'.format(self.crys.chemistry[self.chem]), \
-                         'solute_{}'.format(self.crys.chemistry[self.chem])
+        vacdef, soldef = 'v_{}'.format(crys.chemistry[self.chem]), \
+                         'solute_{}'.format(crys.chemistry[self.chem])
         for k, v in supercelldict['states'].items():
             defectcontent = v.defectindices()
             self.assertGreaterEqual(len(defectcontent), 1, msg='{} has no defect types?'.format(k))
@@ -645,20 +710,32 @@ class CrystalOnsagerTestsB2(DiffusionTestCase):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal.BCC(self.a0)
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.87 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Body-Centered Cubic a0={}'.format(self.a0)
-
-        self.crys2 = crystal.Crystal(self.a0 * np.eye(3), [np.zeros(3), np.array([0.45, 0.45, 0.45])])
-        self.jumpnetwork2 = self.crys2.jumpnetwork(self.chem, 0.99 * self.a0)
-        self.sitelist2 = self.crys2.sitelist(self.chem)
-        self.crystalname2 = 'B2 a0={}'.format(self.a0)
-
-        self.solutebinding = 3.
+    # the high symmetry crystal, and its equivalent with lower symmetry, are built by _build_crys;
+    # cutoff and cutoff2 are their jump cutoff distances in units of a0
+    a0 = 1.
+    chem = 0
+    cutoff, cutoff2 = 0.87, 0.99
+    crystalname = 'Body-Centered Cubic a0=1.0'
+    crystalname2 = 'B2 a0=1.0'
+    solutebinding = 3.
+
+    @classmethod
+    def _build_crys(cls):
+        """Construct the two crystals (high and low symmetry) for the class; called once, from setUpClass"""
+        return crystal.Crystal.BCC(cls.a0), \
+               crystal.Crystal(cls.a0 * np.eye(3), [np.zeros(3), np.array([0.45, 0.45, 0.45])])
+
+    @classmethod
+    def setUpClass(cls):
+        # the tests only read the crystals and their jump networks, so we construct them once for the class
+        cls.crys, cls.crys2 = cls._build_crys()
+        cls.jumpnetwork = cls.crys.jumpnetwork(cls.chem, cls.cutoff * cls.a0)
+        cls.sitelist = cls.crys.sitelist(cls.chem)
+        cls.jumpnetwork2 = cls.crys2.jumpnetwork(cls.chem, cls.cutoff2 * cls.a0)
+        cls.sitelist2 = cls.crys2.sitelist(cls.chem)
+        # calculators with one neighbor shell, shared by the tracer and solute tests
+        cls.Diffusivity1 = OnsagerCalc.VacancyMediated(cls.crys, cls.chem, cls.sitelist, cls.jumpnetwork, 1)
+        cls.Diffusivity2 = OnsagerCalc.VacancyMediated(cls.crys2, cls.chem, cls.sitelist2, cls.jumpnetwork2, 1)
 
     def testtracer(self):
         """Test that high symmetry mapped onto low symmetry match exactly (tracer)"""
@@ -667,9 +744,7 @@ class CrystalOnsagerTestsB2(DiffusionTestCase):
                                         inspect.currentframe().f_code.co_name)
         self.logger.debug('Crystal: ' + self.crystalname)
         self.logger.debug('Crystal2: ' + self.crystalname2)
-        # Make a calculator with one neighbor shell
-        Diffusivity1 = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
-        Diffusivity2 = OnsagerCalc.VacancyMediated(self.crys2, self.chem, self.sitelist2, self.jumpnetwork2, 1)
+        Diffusivity1, Diffusivity2 = self.Diffusivity1, self.Diffusivity2
         thermaldef1 = self.makeunitythermodict(Diffusivity1)
         thermaldef2 = self.makeunitythermodict(Diffusivity2)
         # BCC vs. B2
@@ -686,9 +761,7 @@ class CrystalOnsagerTestsB2(DiffusionTestCase):
         self.logger.debug('Crystal: ' + self.crystalname)
         self.logger.debug('Crystal2: ' + self.crystalname2)
         self.logger.debug('  Solute test: SV binding = {}'.format(self.solutebinding))
-        # Make a calculator with one neighbor shell
-        Diffusivity1 = OnsagerCalc.VacancyMediated(self.crys, self.chem, self.sitelist, self.jumpnetwork, 1)
-        Diffusivity2 = OnsagerCalc.VacancyMediated(self.crys2, self.chem, self.sitelist2, self.jumpnetwork2, 1)
+        Diffusivity1, Diffusivity2 = self.Diffusivity1, self.Diffusivity2
         thermaldef1 = self.makeunitythermodict(Diffusivity1, solutebinding=self.solutebinding)
         thermaldef2 = self.makeunitythermodict(Diffusivity2, solutebinding=self.solutebinding)
         # BCC vs. B2
@@ -703,21 +776,15 @@ class CrystalOnsagerTestsL12(CrystalOnsagerTestsB2):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal.FCC(self.a0)
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 0.71 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Face-Centered Cubic a0={}'.format(self.a0)
-
-        self.crys2 = crystal.Crystal(self.a0 * np.eye(3), [np.zeros(3), np.array([0.05, 0.5, 0.5]),
-                                                           np.array([0.5, 0.05, 0.5]), np.array([0.5, 0.5, 0.05])])
-        self.jumpnetwork2 = self.crys2.jumpnetwork(self.chem, 0.99 * self.a0)
-        self.sitelist2 = self.crys2.sitelist(self.chem)
-        self.crystalname2 = 'L1_2 a0={}'.format(self.a0)
+    cutoff, cutoff2 = 0.71, 0.99
+    crystalname = 'Face-Centered Cubic a0=1.0'
+    crystalname2 = 'L1_2 a0=1.0'
 
-        self.solutebinding = 3.
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal.FCC(cls.a0), \
+               crystal.Crystal(cls.a0 * np.eye(3), [np.zeros(3), np.array([0.05, 0.5, 0.5]),
+                                                    np.array([0.5, 0.05, 0.5]), np.array([0.5, 0.5, 0.05])])
 
 
 class CrystalOnsagerTestsDisplacedTria(CrystalOnsagerTestsB2):
@@ -725,24 +792,18 @@ class CrystalOnsagerTestsDisplacedTria(CrystalOnsagerTestsB2):
 
     longMessage = False
 
-    def setUp(self):
-        self.a0 = 1.
-        self.crys = crystal.Crystal(self.a0 * np.array([[1/2,1/2],
-                                                        [-np.sqrt(3/4),np.sqrt(3/4)]]),
-                                    [np.zeros(2)])
-        self.chem = 0
-        self.jumpnetwork = self.crys.jumpnetwork(self.chem, 1.01 * self.a0)
-        self.sitelist = self.crys.sitelist(self.chem)
-        self.crystalname = 'Triangle a0={}'.format(self.a0)
-
-        self.crys2 = crystal.Crystal(self.a0 * np.array([[1.,0.],
-                                                         [0.,np.sqrt(3.)]]),
-                                    [np.zeros(2),np.array([0.5, 0.4])])
-        self.jumpnetwork2 = self.crys2.jumpnetwork(self.chem, 1.2 * self.a0)
-        self.sitelist2 = self.crys2.sitelist(self.chem)
-        self.crystalname2 = 'Doubled Triangle a0={}'.format(self.a0)
+    cutoff, cutoff2 = 1.01, 1.2
+    crystalname = 'Triangle a0=1.0'
+    crystalname2 = 'Doubled Triangle a0=1.0'
 
-        self.solutebinding = 3.
+    @classmethod
+    def _build_crys(cls):
+        return crystal.Crystal(cls.a0 * np.array([[1/2,1/2],
+                                                  [-np.sqrt(3/4),np.sqrt(3/4)]]),
+                               [np.zeros(2)]), \
+               crystal.Crystal(cls.a0 * np.array([[1.,0.],
+                                                  [0.,np.sqrt(3.)]]),
+                               [np.zeros(2),np.array([0.5, 0.4])])
 
 
 class CrystalOnsagerTestsRumpledOmega(DiffusionTestCase):
@@ -831,28 +892,35 @@ class CrystalOnsagerTestsRumpledOmega(DiffusionTestCase):
 class InterstitialTests(unittest.TestCase):
     """Tests for our interstitial diffusion calculator"""
 
+    @classmethod
+    def setUpClass(cls):
+        # Both HCP and FCC crystals with octahedral and tetrahedral sites; the tests only read
+        # (or strain into new crystals) these, so we construct them once for the class
+        cls.a0 = 3
+        cls.c_a = np.sqrt(8. / 3.)
+        cls.fcclatt = cls.a0 * np.array([[0, 0.5, 0.5],
+                                         [0.5, 0, 0.5],
+                                         [0.5, 0.5, 0]])
+        cls.fccbasis = [[np.zeros(3)], [np.array([0.5, 0.5, -0.5]),
+                                        np.array([0.25, 0.25, 0.25]),
+                                        np.array([0.75, 0.75, 0.75])]]
+        cls.hexlatt = cls.a0 * np.array([[0.5, 0.5, 0],
+                                         [-np.sqrt(0.75), np.sqrt(0.75), 0],
+                                         [0, 0, cls.c_a]])
+        cls.hcpbasis = [[np.array([1. / 3., 2. / 3., 0.25]), np.array([2. / 3., 1. / 3., 0.75])],
+                        [np.array([0., 0., 0.]), np.array([0., 0., 0.5]),
+                         np.array([1. / 3., 2. / 3., 0.625]), np.array([1. / 3., 2. / 3., 0.875]),
+                         np.array([2. / 3., 1. / 3., 0.125]), np.array([2. / 3., 1. / 3., 0.375])]]
+        cls.HCP_intercrys = crystal.Crystal(cls.hexlatt, cls.hcpbasis, chemistry=['Mg', 'O'])
+        cls.FCC_intercrys = crystal.Crystal(cls.fcclatt, cls.fccbasis, chemistry=['Pd', 'H'])
+
     def setUp(self):
-        # Both HCP and FCC diffusion networks with octahedral and tetrahedral sites
-        self.a0 = 3
-        self.c_a = np.sqrt(8. / 3.)
-        self.fcclatt = self.a0 * np.array([[0, 0.5, 0.5],
-                                           [0.5, 0, 0.5],
-                                           [0.5, 0.5, 0]])
-        self.fccbasis = [[np.zeros(3)], [np.array([0.5, 0.5, -0.5]),
-                                         np.array([0.25, 0.25, 0.25]),
-                                         np.array([0.75, 0.75, 0.75])]]
-        self.hexlatt = self.a0 * np.array([[0.5, 0.5, 0],
-                                           [-np.sqrt(0.75), np.sqrt(0.75), 0],
-                                           [0, 0, self.c_a]])
-        self.hcpbasis = [[np.array([1. / 3., 2. / 3., 0.25]), np.array([2. / 3., 1. / 3., 0.75])],
-                         [np.array([0., 0., 0.]), np.array([0., 0., 0.5]),
-                          np.array([1. / 3., 2. / 3., 0.625]), np.array([1. / 3., 2. / 3., 0.875]),
-                          np.array([2. / 3., 1. / 3., 0.125]), np.array([2. / 3., 1. / 3., 0.375])]]
-        self.HCP_intercrys = crystal.Crystal(self.hexlatt, self.hcpbasis, chemistry=['Mg', 'O'])
+        # diffusion networks for the octahedral and tetrahedral sites
         self.HCP_jumpnetwork = self.HCP_intercrys.jumpnetwork(1, self.a0 * 0.7)  # tuned to avoid t->t in basal plane
         self.HCP_sitelist = self.HCP_intercrys.sitelist(1)
         self.Dhcp = OnsagerCalc.Interstitial(self.HCP_intercrys, 1, self.HCP_sitelist, self.HCP_jumpnetwork)
-        self.FCC_intercrys = crystal.Crystal(self.fcclatt, self.fccbasis, chemistry=['Pd', 'H'])
+        # the tet->tet jumps are the only ones with 4 jumps in their list
+        self.HCP_TTmask = np.array([len(jumps) == 4 for jumps in self.Dhcp.jumpnetwork])
         self.FCC_jumpnetwork = self.FCC_intercrys.jumpnetwork(1, self.a0 * 0.48)
         self.FCC_sitelist = self.FCC_intercrys.sitelist(1)
         self.Dfcc = OnsagerCalc.Interstitial(self.FCC_intercrys, 1, self.FCC_sitelist, self.FCC_jumpnetwork)
@@ -866,6 +934,29 @@ class InterstitialTests(unittest.TestCase):
                 failmsg += line0 + '\t' + line1 + '\n'
             self.fail(msg=failmsg)
 
+    def fccthermals(self, preoct, pretet, BEoct, BEtet, preTrans=1., BETrans=0.):
+        """Return pre, BE, preT, BET arrays for FCC, given the octahedral, tetrahedral, and transition values"""
+        pre = np.zeros(len(self.FCC_sitelist))
+        BE = np.zeros(len(self.FCC_sitelist))
+        pre[self.Dfcc.invmap[0]] = preoct
+        pre[self.Dfcc.invmap[1]] = pretet
+        BE[self.Dfcc.invmap[0]] = BEoct
+        BE[self.Dfcc.invmap[1]] = BEtet
+        return pre, BE, np.array([preTrans]), np.array([BETrans])
+
+    def hcpthermals(self, preoct, pretet, BEoct, BEtet,
+                    preTransOT=1., preTransTT=1., BETransOT=0., BETransTT=0.):
+        """Return pre, BE, preT, BET arrays for HCP, given the oct., tet., and oct-tet / tet-tet transition values"""
+        pre = np.zeros(len(self.HCP_sitelist))
+        BE = np.zeros(len(self.HCP_sitelist))
+        pre[self.Dhcp.invmap[0]] = preoct
+        pre[self.Dhcp.invmap[2]] = pretet
+        BE[self.Dhcp.invmap[0]] = BEoct
+        BE[self.Dhcp.invmap[2]] = BEtet
+        preT = np.where(self.HCP_TTmask, preTransTT, preTransOT)
+        BET = np.where(self.HCP_TTmask, BETransTT, BETransOT)
+        return pre, BE, preT, BET
+
     def testVectorBasis(self):
         """Do we correctly analyze our crystals regarding their symmetry?"""
         self.assertEqual(self.Dhcp.NV, 1)
@@ -932,22 +1023,12 @@ class InterstitialTests(unittest.TestCase):
         preoct = 1
         pretet = 2
         BEoct = 0
-        BEtet = np.log(2)  # so exp(-beta*E) = 1/2
-        pre = np.zeros(len(self.HCP_sitelist))
-        BE = np.zeros(len(self.HCP_sitelist))
-        pre[self.Dhcp.invmap[0]] = preoct
-        pre[self.Dhcp.invmap[2]] = pretet
-        BE[self.Dhcp.invmap[0]] = BEoct
-        BE[self.Dhcp.invmap[2]] = BEtet
+        BEtet = LOG2  # so exp(-beta*E) = 1/2
+        pre, BE = self.hcpthermals(preoct, pretet, BEoct, BEtet)[:2]
         # With this, we have 6 sites total, and they should all have equal probability: so 1/6 is the answer.
         self.assertTrue(np.allclose(np.ones(self.Dhcp.N) / self.Dhcp.N, self.Dhcp.siteprob(pre, BE)))
         # FCC
-        pre = np.zeros(len(self.FCC_sitelist))
-        BE = np.zeros(len(self.FCC_sitelist))
-        pre[self.Dfcc.invmap[0]] = preoct
-        pre[self.Dfcc.invmap[1]] = pretet
-        BE[self.Dfcc.invmap[0]] = BEoct
-        BE[self.Dfcc.invmap[1]] = BEtet
+        pre, BE = self.fccthermals(preoct, pretet, BEoct, BEtet)[:2]
         # With this, we have 3 sites total, and they should all have equal probability: so 1/3 is the answer.
         self.assertTrue(np.allclose(np.ones(self.Dfcc.N) / self.Dfcc.N, self.Dfcc.siteprob(pre, BE)))
 
@@ -957,17 +1038,10 @@ class InterstitialTests(unittest.TestCase):
         preoct = 1
         pretet = 2
         BEoct = 0
-        BEtet = np.log(2)  # so exp(-beta*E) = 1/2
+        BEtet = LOG2  # so exp(-beta*E) = 1/2
         preTrans = 10
-        BETrans = np.log(10)  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
-        pre = np.zeros(len(self.FCC_sitelist))
-        BE = np.zeros(len(self.FCC_sitelist))
-        pre[self.Dfcc.invmap[0]] = preoct
-        pre[self.Dfcc.invmap[1]] = pretet
-        BE[self.Dfcc.invmap[0]] = BEoct
-        BE[self.Dfcc.invmap[1]] = BEtet
-        preT = np.array([preTrans])
-        BET = np.array([BETrans])
+        BETrans = LOG10  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
+        pre, BE, preT, BET = self.fccthermals(preoct, pretet, BEoct, BEtet, preTrans, BETrans)
         self.assertTrue(all(np.isclose(rate, 1)
                             for ratelist in self.Dfcc.ratelist(pre, BE, preT, BET)
                             for rate in ratelist))
@@ -981,25 +1055,12 @@ class InterstitialTests(unittest.TestCase):
                 self.assertAlmostEqual(rate, 2)  # tet->oct
 
         # HCP
-        pre = np.zeros(len(self.HCP_sitelist))
-        BE = np.zeros(len(self.HCP_sitelist))
-        pre[self.Dhcp.invmap[0]] = preoct
-        pre[self.Dhcp.invmap[2]] = pretet
-        BE[self.Dhcp.invmap[0]] = BEoct
-        BE[self.Dhcp.invmap[2]] = BEtet
         preTransOT = 10.
         preTransTT = 100.
-        BETransOT = np.log(10.)
-        BETransTT = np.log(10.)
-        preT = np.zeros(len(self.Dhcp.jumpnetwork))
-        BET = np.zeros(len(self.Dhcp.jumpnetwork))
-        for i, jump in enumerate(self.Dhcp.jumpnetwork):
-            if len(jump) == 4:
-                preT[i] = preTransTT
-                BET[i] = BETransTT
-            else:
-                preT[i] = preTransOT
-                BET[i] = BETransOT
+        BETransOT = LOG10
+        BETransTT = LOG10
+        pre, BE, preT, BET = self.hcpthermals(preoct, pretet, BEoct, BEtet,
+                                              preTransOT, preTransTT, BETransOT, BETransTT)
         # oct->tet jumps have rate 1, tet->tet jumps have rate 10.
         ratelist = self.Dhcp.ratelist(pre, BE, preT, BET)
         for jumps, rates in zip(self.Dhcp.jumpnetwork, ratelist):
@@ -1084,42 +1145,22 @@ class InterstitialTests(unittest.TestCase):
         preoct = 1.
         pretet = 2.
         BEoct = 0.
-        BEtet = np.log(2)  # so exp(-beta*E) = 1/2
+        BEtet = LOG2  # so exp(-beta*E) = 1/2
         preTrans = 10.
-        BETrans = np.log(10)  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
-        pre = np.zeros(len(self.FCC_sitelist))
-        BE = np.zeros(len(self.FCC_sitelist))
-        pre[self.Dfcc.invmap[0]] = preoct
-        pre[self.Dfcc.invmap[1]] = pretet
-        BE[self.Dfcc.invmap[0]] = BEoct
-        BE[self.Dfcc.invmap[1]] = BEtet
-        preT = np.array([preTrans])
-        BET = np.array([BETrans])
+        BETrans = LOG10  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
+        pre, BE, preT, BET = self.fccthermals(preoct, pretet, BEoct, BEtet, preTrans, BETrans)
 
         Dfcc_anal = 0.5 * self.a0 ** 2 * preTrans * np.exp(-BETrans) / (
             preoct * np.exp(-BEoct) + 2 * pretet * np.exp(-BEtet))
         self.assertTrue(np.allclose(Dfcc_anal * np.eye(3), self.Dfcc.diffusivity(pre, BE, preT, BET)))
 
         # HCP
-        pre = np.zeros(len(self.HCP_sitelist))
-        BE = np.zeros(len(self.HCP_sitelist))
-        pre[self.Dhcp.invmap[0]] = preoct
-        pre[self.Dhcp.invmap[2]] = pretet
-        BE[self.Dhcp.invmap[0]] = BEoct
-        BE[self.Dhcp.invmap[2]] = BEtet
         preTransOT = 10.
         preTransTT = 100.
-        BETransOT = np.log(10.)
-        BETransTT = np.log(10.)
-        preT = np.zeros(len(self.Dhcp.jumpnetwork))
-        BET = np.zeros(len(self.Dhcp.jumpnetwork))
-        for i, jump in enumerate(self.Dhcp.jumpnetwork):
-            if len(jump) == 4:
-                preT[i] = preTransTT
-                BET[i] = BETransTT
-            else:
-                preT[i] = preTransOT
-                BET[i] = BETransOT
+        BETransOT = LOG10
+        BETransTT = LOG10
+        pre, BE, preT, BET = self.hcpthermals(preoct, pretet, BEoct, BEtet,
+                                              preTransOT, preTransTT, BETransOT, BETransTT)
         Dhcp_basal = self.a0 ** 2 * preTransOT * np.exp(-BETransOT) / (
             preoct * np.exp(-BEoct) + 2 * pretet * np.exp(-BEtet))
         Dhcp_c = 0.75 * self.c_a ** 2 * Dhcp_basal / (3 * preTransOT / preTransTT * np.exp(-BETransOT + BETransTT) + 2)
@@ -1133,24 +1174,17 @@ class InterstitialTests(unittest.TestCase):
         preoct = 1.
         pretet = 2.
         BEoct = 0.
-        BEtet = np.log(2)  # so exp(-beta*E) = 1/2
+        BEtet = LOG2  # so exp(-beta*E) = 1/2
         preTrans = 10.
-        BETrans = np.log(10)  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
-        pre = np.zeros(len(self.FCC_sitelist))
-        BE = np.zeros(len(self.FCC_sitelist))
-        pre[self.Dfcc.invmap[0]] = preoct
-        pre[self.Dfcc.invmap[1]] = pretet
-        BE[self.Dfcc.invmap[0]] = BEoct
-        BE[self.Dfcc.invmap[1]] = BEtet
-        preT = np.array([preTrans])
-        BET = np.array([BETrans])
+        BETrans = LOG10  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
+        pre, BE, preT, BET = self.fccthermals(preoct, pretet, BEoct, BEtet, preTrans, BETrans)
 
         Eave = (preoct * np.exp(-BEoct) * BEoct + 2 * pretet * np.exp(-BEtet) * BEtet) / \
                (preoct * np.exp(-BEoct) + 2 * pretet * np.exp(-BEtet))
         Dfcc, DfccE = self.Dfcc.diffusivity(pre, BE, preT, BET, CalcDeriv=True)
-        # rather than use inv and dot, we use solve; NOTE: we compute the derivative and NOT the
+        # rather than use inv and dot, we solve the 3x3 system directly; NOTE: we compute the derivative and NOT the
         # logarithmic derivative in case Dfcc is, e.g., 2D so has no diffusivity in a particular direction
-        Eb = np.linalg.solve(Dfcc, DfccE)
+        Eb = solve3(Dfcc, DfccE)
         failmsg = """
 Energy barrier tensor:
 {}
@@ -1159,31 +1193,18 @@ BETrans: {}  BEoct: {}  BEtet: {}  Eave: {}
         self.assertTrue(np.allclose((BETrans - Eave) * np.eye(3), Eb), msg=failmsg)
 
         # HCP
-        pre = np.zeros(len(self.HCP_sitelist))
-        BE = np.zeros(len(self.HCP_sitelist))
-        pre[self.Dhcp.invmap[0]] = preoct
-        pre[self.Dhcp.invmap[2]] = pretet
-        BE[self.Dhcp.invmap[0]] = BEoct
-        BE[self.Dhcp.invmap[2]] = BEtet
         preTransOT = 10.
         preTransTT = 100.
-        BETransOT = np.log(10.)
-        BETransTT = np.log(10.)
-        preT = np.zeros(len(self.Dhcp.jumpnetwork))
-        BET = np.zeros(len(self.Dhcp.jumpnetwork))
-        for i, jump in enumerate(self.Dhcp.jumpnetwork):
-            if len(jump) == 4:
-                preT[i] = preTransTT
-                BET[i] = BETransTT
-            else:
-                preT[i] = preTransOT
-                BET[i] = BETransOT
+        BETransOT = LOG10
+        BETransTT = LOG10
+        pre, BE, preT, BET = self.hcpthermals(preoct, pretet, BEoct, BEtet,
+                                              preTransOT, preTransTT, BETransOT, BETransTT)
         Eave = (preoct * np.exp(-BEoct) * BEoct + 2 * pretet * np.exp(-BEtet) * BEtet) / \
                (preoct * np.exp(-BEoct) + 2 * pretet * np.exp(-BEtet))
         Dhcp, DhcpE = self.Dhcp.diffusivity(pre, BE, preT, BET, CalcDeriv=True)
-        # rather than use inv and dot, we use solve; NOTE: we compute the derivative and NOT the
+        # rather than use inv and dot, we solve the 3x3 system directly; NOTE: we compute the derivative and NOT the
         # logarithmic derivative in case Dfcc is, e.g., 2D so has no diffusivity in a particular direction
-        Eb = np.linalg.solve(Dhcp, DhcpE)
+        Eb = solve3(Dhcp, DhcpE)
         Eb_anal = np.eye(3)
         Eb_anal[0, 0] = BETransOT - Eave
         Eb_anal[1, 1] = BETransOT - Eave
@@ -1224,12 +1245,11 @@ BETrans: {}  BEoct: {}  BEtet: {}  Eave: {}
         dipoleT = [-0.5 * np.eye(3) + 2. * np.outer(dx, dx)]  # this should remain unchanged
         sitedipoles = self.Dfcc.siteDipoles(dipole)
         jumpdipoles = self.Dfcc.jumpDipoles(dipoleT)
-        for dip in sitedipoles:
-            self.assertTrue(np.allclose(dip, np.eye(3)))
+        self.assertTrue(np.allclose(np.array(sitedipoles), I3))
         self.assertTrue(np.allclose(dipoleT[0], jumpdipoles[0][0]))
-        self.assertTrue(np.allclose(np.trace(dipoleT[0]) * np.eye(3) / 3., sum(jumpdipoles[0]) / len(jumpdipoles[0])))
-        for ((i, j), dx), dipole in zip(self.Dfcc.jumpnetwork[0], jumpdipoles[0]):
-            self.assertTrue(np.allclose(-0.5 * np.eye(3) + 2. * np.outer(dx, dx), dipole))
+        self.assertTrue(np.allclose((np.trace(dipoleT[0]) / 3.) * I3, np.mean(jumpdipoles[0], axis=0)))
+        DX = jumparray(self.Dfcc.jumpnetwork[0])['dx']
+        self.assertTrue(np.allclose(-0.5 * I3 + 2. * np.einsum('ni,nj->nij', DX, DX), np.array(jumpdipoles[0])))
 
     def testFCCElastodiffusion(self):
         """Elastodiffusion tensor without correlation; compare with finite difference"""
@@ -1237,110 +1257,81 @@ BETrans: {}  BEoct: {}  BEtet: {}  Eave: {}
         preoct = 1.
         pretet = 0.5
         BEoct = 0.
-        BEtet = np.log(2)  # so exp(-beta*E) = 1/2
+        BEtet = LOG2  # so exp(-beta*E) = 1/2
         preTrans = 10.
-        BETrans = np.log(10)  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
-        pre = np.zeros(len(self.FCC_sitelist))
-        BE = np.zeros(len(self.FCC_sitelist))
-        pre[self.Dfcc.invmap[0]] = preoct
-        pre[self.Dfcc.invmap[1]] = pretet
-        BE[self.Dfcc.invmap[0]] = BEoct
-        BE[self.Dfcc.invmap[1]] = BEtet
-        preT = np.array([preTrans])
-        BET = np.array([BETrans])
+        BETrans = LOG10  # so that our rate should be 10*exp(-BET) / (1*exp(0)) = 1
+        pre, BE, preT, BET = self.fccthermals(preoct, pretet, BEoct, BEtet, preTrans, BETrans)
 
         octP = 1.
         tetP = -1.
         transPpara = 0.5
         transPperp = -0.5
         dipole = [0, 0]
-        dipole[self.Dfcc.invmap[0]] = octP * np.eye(3)
-        dipole[self.Dfcc.invmap[1]] = tetP * np.eye(3)
+        dipole[self.Dfcc.invmap[0]] = octP * I3
+        dipole[self.Dfcc.invmap[1]] = tetP * I3
         (i, j), dx = self.Dfcc.jumpnetwork[0][0]  # our representative jump
-        dipoleT = [transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx, dx) / np.dot(dx, dx)]
+        dipoleT = [transdipole(dx, transPperp, transPpara)]
         sitedipoles = self.Dfcc.siteDipoles(dipole)
         jumpdipoles = self.Dfcc.jumpDipoles(dipoleT)
 
         # strain
         D0, Dp = self.Dfcc.elastodiffusion(pre, BE, dipole, preT, BET, dipoleT)
-        # test for correct symmetry of our tensors:
-        for i in range(3):
-            for j in range(3):
-                self.assertAlmostEqual(D0[i, j], D0[j, i], msg="{}\nnot symmetric".format(D0))
-                for k in range(3):
-                    for l in range(3):
-                        self.assertAlmostEqual(Dp[i, j, k, l], Dp[j, i, k, l],
-                                               msg="{}{}{}{} != {}{}{}{}\n{}\nnot symmetric".format(i, j, k, l, j, i, k,
-                                                                                                    l, Dp))
-                        self.assertAlmostEqual(Dp[i, j, k, l], Dp[i, j, l, k],
-                                               msg="{}{}{}{} != {}{}{}{}\n{}\nnot symmetric".format(i, j, k, l, i, j, l,
-                                                                                                    k, Dp))
-                        self.assertAlmostEqual(Dp[i, j, k, l], Dp[j, i, l, k],
-                                               msg="{}{}{}{} != {}{}{}{}\n{}\nnot symmetric".format(i, j, k, l, j, i, l,
-                                                                                                    k, Dp))
+        # test for correct symmetry of our tensors (to the 7 places of assertAlmostEqual):
+        # (assert_allclose only formats the arrays if the check fails)
+        np.testing.assert_allclose(D0, D0.T, rtol=0, atol=5e-8, err_msg='D0 not symmetric')
+        for axes, swap in (((1, 0, 2, 3), 'jikl'), ((0, 1, 3, 2), 'ijlk'), ((1, 0, 3, 2), 'jilk')):
+            np.testing.assert_allclose(Dp, Dp.transpose(axes), rtol=0, atol=5e-8,
+                                       err_msg='Dp not symmetric: ijkl != ' + swap)
         eps = 1e-4
-        # use Voigtstrain to run through the 6 strains; np.eye(6) generates 6 unit vectors
-        for straintype in [crystal.Voigtstrain(*s) for s in np.eye(6)]:
+        cutoff = self.a0 * 0.48  # jump cutoff for the strained crystals
+        Deps = []  # finite-difference derivative of D for each strain
+        # run through the 6 unit Voigt strains
+        for straintype in VOIGT_BASIS:
             strainmat = eps * straintype
-            strainedFCCpos = self.FCC_intercrys.strain(strainmat)
-            strainedFCCpos_jumpnetwork = strainedFCCpos.jumpnetwork(1, self.a0 * 0.48)
-            strainedFCCpos_sitelist = strainedFCCpos.sitelist(1)
-            strainedDfccpos = OnsagerCalc.Interstitial(strainedFCCpos, 1,
-                                                       strainedFCCpos_sitelist,
-                                                       strainedFCCpos_jumpnetwork)
-            self.assertTrue(strainedDfccpos.omega_invertible)
-
-            strainedpospre = np.zeros(len(strainedFCCpos_sitelist))
-            strainedposBE = np.zeros(len(strainedFCCpos_sitelist))
-            # apply dipoles to site energies:
-            for octind in range(1):
-                strainedpospre[strainedDfccpos.invmap[octind]] = preoct
-                strainedposBE[strainedDfccpos.invmap[octind]] = BEoct - np.sum(sitedipoles[octind] * strainmat)
-            for tetind in range(1, 3):
-                strainedpospre[strainedDfccpos.invmap[tetind]] = pretet
-                strainedposBE[strainedDfccpos.invmap[tetind]] = BEtet - np.sum(sitedipoles[tetind] * strainmat)
-            strainedposBET = np.zeros(len(strainedFCCpos_jumpnetwork))
-            strainedpospreT = np.zeros(len(strainedFCCpos_jumpnetwork))
-            # this gets more complicated...
-            for ind, jumps in enumerate(strainedFCCpos_jumpnetwork):
-                (i, j), dx = jumps[0]
-                dx0 = np.linalg.solve(np.eye(3) + strainmat, dx)
-                dip = transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx0, dx0) / np.dot(dx0, dx0)
-                strainedpospreT[ind] = preTrans
-                strainedposBET[ind] = BETrans - np.sum(dip * strainmat)
-
-            strainedFCCneg = self.FCC_intercrys.strain(-strainmat)
-            strainedFCCneg_jumpnetwork = strainedFCCneg.jumpnetwork(1, self.a0 * 0.48)
-            strainedFCCneg_sitelist = strainedFCCneg.sitelist(1)
-            strainedDfccneg = OnsagerCalc.Interstitial(strainedFCCneg, 1,
-                                                       strainedFCCneg_sitelist,
-                                                       strainedFCCneg_jumpnetwork)
-            self.assertTrue(strainedDfccneg.omega_invertible)
-
-            strainednegpre = np.zeros(len(strainedFCCneg_sitelist))
-            strainednegBE = np.zeros(len(strainedFCCneg_sitelist))
-            # apply dipoles to site energies:
-            for octind in range(1):
-                strainednegpre[strainedDfccneg.invmap[octind]] = preoct
-                strainednegBE[strainedDfccneg.invmap[octind]] = BEoct + np.sum(sitedipoles[octind] * strainmat)
-            for tetind in range(1, 3):
-                strainednegpre[strainedDfccneg.invmap[tetind]] = pretet
-                strainednegBE[strainedDfccneg.invmap[tetind]] = BEtet + np.sum(sitedipoles[tetind] * strainmat)
-            strainednegBET = np.zeros(len(strainedFCCneg_jumpnetwork))
-            strainednegpreT = np.zeros(len(strainedFCCneg_jumpnetwork))
-            # this gets more complicated...
-            for ind, jumps in enumerate(strainedFCCneg_jumpnetwork):
-                (i, j), dx = jumps[0]
-                dx0 = np.linalg.solve(np.eye(3) - strainmat, dx)
-                dip = transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx0, dx0) / np.dot(dx0, dx0)
-                strainednegpreT[ind] = preTrans
-                strainednegBET[ind] = BETrans + np.sum(dip * strainmat)
-            Deps = strainedDfccpos.diffusivity(strainedpospre, strainedposBE, strainedpospreT, strainedposBET) - \
-                   strainedDfccneg.diffusivity(strainednegpre, strainednegBE, strainednegpreT, strainednegBET)
-
-            Deps /= 2 * eps
-            Deps0 = np.tensordot(Dp, strainmat, axes=((2, 3), (0, 1))) / eps
-            failmsg = """
+            strainflat = strainmat.ravel()  # dipole-strain contractions are dot products with this
+            # +- finite difference: one strained calculator for each sign of the strain. These run in
+            # sequence: each sign needs its own calculator (diffusivity has no batch axis to share), and
+            # the time goes into building the strained crystals and calculators in Python, not into
+            # diffusivity (about 4% of the test), so threads would only contend for the GIL
+            Dstrained = []
+            for sign in (1, -1):
+                strainedFCC = self.FCC_intercrys.strain(sign * strainmat)
+                strainedFCC_jumpnetwork = strainedFCC.jumpnetwork(1, cutoff)
+                strainedFCC_sitelist = strainedFCC.sitelist(1)
+                strainedDfcc = OnsagerCalc.Interstitial(strainedFCC, 1,
+                                                        strainedFCC_sitelist,
+                                                        strainedFCC_jumpnetwork)
+                self.assertTrue(strainedDfcc.omega_invertible)
+
+                # every site is in the sitelist, so the loops below fill every entry
+                strainedpre = np.empty(len(strainedFCC_sitelist))
+                strainedBE = np.empty(len(strainedFCC_sitelist))
+                # apply dipoles to site energies:
+                for octind in range(1):
+                    strainedpre[strainedDfcc.invmap[octind]] = preoct
+                    strainedBE[strainedDfcc.invmap[octind]] = \
+                        BEoct - sign * np.dot(sitedipoles[octind].ravel(), strainflat)
+                for tetind in range(1, 3):
+                    strainedpre[strainedDfcc.invmap[tetind]] = pretet
+                    strainedBE[strainedDfcc.invmap[tetind]] = \
+                        BEtet - sign * np.dot(sitedipoles[tetind].ravel(), strainflat)
+                # this gets more complicated...; we unstrain all of the jump vectors with one inverse per strain
+                invstrain = inv3(I3 + sign * strainmat)
+                DX0 = np.dot(jumparray(jumps[0] for jumps in strainedFCC_jumpnetwork)['dx'], invstrain.T)
+                dips = transdipole(DX0, transPperp, transPpara)
+                strainedpreT = np.full(len(strainedFCC_jumpnetwork), preTrans)
+                # all of the dipole-strain contractions as one matrix-vector product:
+                strainedBET = BETrans - sign * np.dot(dips.reshape(-1, 9), strainflat)
+                Dstrained.append(strainedDfcc.diffusivity(strainedpre, strainedBE, strainedpreT, strainedBET))
+            Deps.append((Dstrained[0] - Dstrained[1]) / (2 * eps))
+        # compare all 6 finite differences at once with the contraction Dp[a,b,i,j] strain[i,j]
+        Deps = np.array(Deps)
+        Deps0 = np.tensordot(VOIGT_BASIS, Dp, axes=((1, 2), (2, 3)))
+        if not np.allclose(Deps, Deps0, rtol=2 * eps, atol=2 * eps):
+            failmsg = ''
+            for straintype, Dfd, Delastic in zip(VOIGT_BASIS, Deps, Deps0):
+                if not np.allclose(Dfd, Delastic, rtol=2 * eps, atol=2 * eps):
+                    failmsg += """
 strainmatrix:
 {}
 D0:
@@ -1348,8 +1339,8 @@ D0:
 finite difference:
 {}
 elastodiffusion:
-{}""".format(strainmat, D0, Deps, Deps0)
-            self.assertTrue(np.allclose(Deps, Deps0, rtol=2 * eps, atol=2 * eps), msg=failmsg)
+{}""".format(eps * straintype, D0, Dfd, Delastic)
+            self.fail(msg=failmsg)
 
     def testHCPElastodiffusion(self):
         """Elastodiffusion tensor with correlation; compare with finite difference"""
@@ -1357,27 +1348,14 @@ elastodiffusion:
         preoct = 1.
         pretet = 0.5
         BEoct = 0.
-        BEtet = np.log(2)  # so exp(-beta*E) = 1/2
+        BEtet = LOG2  # so exp(-beta*E) = 1/2
         preTransOT = 10.
         preTransTT = 10.
-        BETransOT = np.log(10.)
-        BETransTT = np.log(10.)
+        BETransOT = LOG10
+        BETransTT = LOG10
 
-        pre = np.zeros(len(self.HCP_sitelist))
-        BE = np.zeros(len(self.HCP_sitelist))
-        pre[self.Dhcp.invmap[0]] = preoct
-        pre[self.Dhcp.invmap[2]] = pretet
-        BE[self.Dhcp.invmap[0]] = BEoct
-        BE[self.Dhcp.invmap[2]] = BEtet
-        preT = np.zeros(len(self.Dhcp.jumpnetwork))
-        BET = np.zeros(len(self.Dhcp.jumpnetwork))
-        for i, jump in enumerate(self.Dhcp.jumpnetwork):
-            if len(jump) == 4:
-                preT[i] = preTransTT
-                BET[i] = BETransTT
-            else:
-                preT[i] = preTransOT
-                BET[i] = BETransOT
+        pre, BE, preT, BET = self.hcpthermals(preoct, pretet, BEoct, BEtet,
+                                              preTransOT, preTransTT, BETransOT, BETransTT)
 
         octPb = 1.
         octPc = 2.
@@ -1392,7 +1370,7 @@ elastodiffusion:
         # use the same dipole expression for all jumps:
         for jumps in self.Dhcp.jumpnetwork:
             (i, j), dx = jumps[0]  # our representative jump
-            dipoleT.append(transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx, dx) / np.dot(dx, dx))
+            dipoleT.append(transdipole(dx, transPperp, transPpara))
         sitedipoles = self.Dhcp.siteDipoles(dipole)
         jumpdipoles = self.Dhcp.jumpDipoles(dipoleT)
         # test that site dipoles are created correctly
@@ -1403,98 +1381,67 @@ elastodiffusion:
                 self.assertTrue(np.allclose(d, np.array([[tetPb, 0, 0], [0, tetPb, 0], [0, 0, tetPc]])))
         # test that jump dipoles are created correctly
         for jumps, dipoles in zip(self.Dhcp.jumpnetwork, jumpdipoles):
-            for (ij, dx), d in zip(jumps, dipoles):
-                dip = transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx, dx) / np.dot(dx, dx)
-                self.assertTrue(np.allclose(dip, d))
+            dips = transdipole(jumparray(jumps)['dx'], transPperp, transPpara)
+            self.assertTrue(np.allclose(dips, np.array(dipoles)))
 
         # strain
         eps = 1e-4
         D0, Dp = self.Dhcp.elastodiffusion(pre, BE, dipole, preT, BET, dipoleT)
-        # test for correct symmetry of our tensors:
-        for i in range(3):
-            for j in range(3):
-                self.assertAlmostEqual(D0[i, j], D0[j, i], msg="{}\nnot symmetric".format(D0))
-                for k in range(3):
-                    for l in range(3):
-                        self.assertAlmostEqual(Dp[i, j, k, l], Dp[j, i, k, l],
-                                               msg="{}{}{}{} != {}{}{}{}\n{}\nnot symmetric".format(i, j, k, l, j, i, k,
-                                                                                                    l, Dp))
-                        self.assertAlmostEqual(Dp[i, j, k, l], Dp[i, j, l, k],
-                                               msg="{}{}{}{} != {}{}{}{}\n{}\nnot symmetric".format(i, j, k, l, i, j, l,
-                                                                                                    k, Dp))
-                        self.assertAlmostEqual(Dp[i, j, k, l], Dp[j, i, l, k],
-                                               msg="{}{}{}{} != {}{}{}{}\n{}\nnot symmetric".format(i, j, k, l, j, i, l,
-                                                                                                    k, Dp))
-        # use Voigtstrain to run through the 6 strains; np.eye(6) generates 6 unit vectors
-        for straintype in [crystal.Voigtstrain(*s) for s in np.eye(6)]:
+        # test for correct symmetry of our tensors (to the 7 places of assertAlmostEqual):
+        # (assert_allclose only formats the arrays if the check fails)
+        np.testing.assert_allclose(D0, D0.T, rtol=0, atol=5e-8, err_msg='D0 not symmetric')
+        for axes, swap in (((1, 0, 2, 3), 'jikl'), ((0, 1, 3, 2), 'ijlk'), ((1, 0, 3, 2), 'jilk')):
+            np.testing.assert_allclose(Dp, Dp.transpose(axes), rtol=0, atol=5e-8,
+                                       err_msg='Dp not symmetric: ijkl != ' + swap)
+        cutoff = self.a0 * 0.7  # jump cutoff for the strained crystals
+        Deps = []  # finite-difference derivative of D for each strain
+        # run through the 6 unit Voigt strains
+        for straintype in VOIGT_BASIS:
             # now doing +- finite difference for a more accurate comparison:
             strainmat = eps * straintype
-            strainedHCPpos = self.HCP_intercrys.strain(strainmat)
-            strainedHCPpos_jumpnetwork = strainedHCPpos.jumpnetwork(1, self.a0 * 0.7)
-            strainedHCPpos_sitelist = strainedHCPpos.sitelist(1)
-            strainedDhcppos = OnsagerCalc.Interstitial(strainedHCPpos, 1,
-                                                       strainedHCPpos_sitelist,
-                                                       strainedHCPpos_jumpnetwork)
-            self.assertTrue(strainedDhcppos.omega_invertible)
-
-            strainedpospre = np.zeros(len(strainedHCPpos_sitelist))
-            strainedposBE = np.zeros(len(strainedHCPpos_sitelist))
-            # apply dipoles to site energies:
-            for octind in range(2):
-                strainedpospre[strainedDhcppos.invmap[octind]] = preoct
-                strainedposBE[strainedDhcppos.invmap[octind]] = BEoct - np.sum(sitedipoles[octind] * strainmat)
-            for tetind in range(2, 6):
-                strainedpospre[strainedDhcppos.invmap[tetind]] = pretet
-                strainedposBE[strainedDhcppos.invmap[tetind]] = BEtet - np.sum(sitedipoles[tetind] * strainmat)
-            strainedposBET = np.zeros(len(strainedHCPpos_jumpnetwork))
-            strainedpospreT = np.zeros(len(strainedHCPpos_jumpnetwork))
-            # this gets more complicated...
-            for ind, jumps in enumerate(strainedHCPpos_jumpnetwork):
-                (i, j), dx = jumps[0]
-                dx0 = np.linalg.solve(np.eye(3) + strainmat, dx)
-                dip = transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx0, dx0) / np.dot(dx0, dx0)
-                if i >= 2 and j >= 2:
-                    strainedpospreT[ind] = preTransTT
-                    strainedposBET[ind] = BETransTT - np.sum(dip * strainmat)
-                else:
-                    strainedpospreT[ind] = preTransOT
-                    strainedposBET[ind] = BETransOT - np.sum(dip * strainmat)
-
-            strainedHCPneg = self.HCP_intercrys.strain(-strainmat)
-            strainedHCPneg_jumpnetwork = strainedHCPneg.jumpnetwork(1, self.a0 * 0.7)
-            strainedHCPneg_sitelist = strainedHCPneg.sitelist(1)
-            strainedDhcpneg = OnsagerCalc.Interstitial(strainedHCPneg, 1,
-                                                       strainedHCPneg_sitelist,
-                                                       strainedHCPneg_jumpnetwork)
-            self.assertTrue(strainedDhcpneg.omega_invertible)
-
-            strainednegpre = np.zeros(len(strainedHCPneg_sitelist))
-            strainednegBE = np.zeros(len(strainedHCPneg_sitelist))
-            # apply dipoles to site energies:
-            for octind in range(2):
-                strainednegpre[strainedDhcpneg.invmap[octind]] = preoct
-                strainednegBE[strainedDhcpneg.invmap[octind]] = BEoct + np.sum(sitedipoles[octind] * strainmat)
-            for tetind in range(2, 6):
-                strainednegpre[strainedDhcpneg.invmap[tetind]] = pretet
-                strainednegBE[strainedDhcpneg.invmap[tetind]] = BEtet + np.sum(sitedipoles[tetind] * strainmat)
-            strainednegBET = np.zeros(len(strainedHCPneg_jumpnetwork))
-            strainednegpreT = np.zeros(len(strainedHCPneg_jumpnetwork))
-            # this gets more complicated...
-            for ind, jumps in enumerate(strainedHCPneg_jumpnetwork):
-                (i, j), dx = jumps[0]
-                dx0 = np.linalg.solve(np.eye(3) - strainmat, dx)
-                dip = transPperp * np.eye(3) + (transPpara - transPperp) * np.outer(dx0, dx0) / np.dot(dx0, dx0)
-                if i >= 2 and j >= 2:
-                    strainednegpreT[ind] = preTransTT
-                    strainednegBET[ind] = BETransTT + np.sum(dip * strainmat)
-                else:
-                    strainednegpreT[ind] = preTransOT
-                    strainednegBET[ind] = BETransOT + np.sum(dip * strainmat)
-            Deps = strainedDhcppos.diffusivity(strainedpospre, strainedposBE, strainedpospreT, strainedposBET) - \
-                   strainedDhcpneg.diffusivity(strainednegpre, strainednegBE, strainednegpreT, strainednegBET)
-            Deps /= 2. * eps
-            Deps0 = np.tensordot(Dp, strainmat, axes=((2, 3), (0, 1))) / eps
-            failmsg = """
+            strainflat = strainmat.ravel()  # dipole-strain contractions are dot products with this
+            # +- finite difference, in sequence for the same reasons as testFCCElastodiffusion
+            Dstrained = []
+            for sign in (1, -1):
+                strainedHCP = self.HCP_intercrys.strain(sign * strainmat)
+                strainedHCP_jumpnetwork = strainedHCP.jumpnetwork(1, cutoff)
+                strainedHCP_sitelist = strainedHCP.sitelist(1)
+                strainedDhcp = OnsagerCalc.Interstitial(strainedHCP, 1,
+                                                        strainedHCP_sitelist,
+                                                        strainedHCP_jumpnetwork)
+                self.assertTrue(strainedDhcp.omega_invertible)
+
+                # every site is in the sitelist, so the loops below fill every entry
+                strainedpre = np.empty(len(strainedHCP_sitelist))
+                strainedBE = np.empty(len(strainedHCP_sitelist))
+                # apply dipoles to site energies:
+                for octind in range(2):
+                    strainedpre[strainedDhcp.invmap[octind]] = preoct
+                    strainedBE[strainedDhcp.invmap[octind]] = \
+                        BEoct - sign * np.dot(sitedipoles[octind].ravel(), strainflat)
+                for tetind in range(2, 6):
+                    strainedpre[strainedDhcp.invmap[tetind]] = pretet
+                    strainedBE[strainedDhcp.invmap[tetind]] = \
+                        BEtet - sign * np.dot(sitedipoles[tetind].ravel(), strainflat)
+                # this gets more complicated...; we unstrain all of the jump vectors with one inverse per strain
+                invstrain = inv3(I3 + sign * strainmat)
+                jumps0 = jumparray(jumps[0] for jumps in strainedHCP_jumpnetwork)
+                DX0 = np.dot(jumps0['dx'], invstrain.T)
+                dips = transdipole(DX0, transPperp, transPpara)
+                dipE = sign * np.dot(dips.reshape(-1, 9), strainflat)  # all of the dipole-strain contractions
+                isTT = np.all(jumps0['ij'] >= 2, axis=1)  # tet-tet jumps; everything else is oct-tet
+                strainedpreT = np.where(isTT, preTransTT, preTransOT)
+                strainedBET = np.where(isTT, BETransTT, BETransOT) - dipE
+                Dstrained.append(strainedDhcp.diffusivity(strainedpre, strainedBE, strainedpreT, strainedBET))
+            Deps.append((Dstrained[0] - Dstrained[1]) / (2. * eps))
+        # compare all 6 finite differences at once with the contraction Dp[a,b,i,j] strain[i,j]
+        Deps = np.array(Deps)
+        Deps0 = np.tensordot(VOIGT_BASIS, Dp, axes=((1, 2), (2, 3)))
+        if not np.allclose(Deps, Deps0, rtol=2 * eps, atol=2 * eps):
+            failmsg = ''
+            for straintype, Dfd, Delastic in zip(VOIGT_BASIS, Deps, Deps0):
+                if not np.allclose(Dfd, Delastic, rtol=2 * eps, atol=2 * eps):
+                    failmsg += """
 strainmatrix:
 {}
 D0:
@@ -1502,8 +1449,8 @@ D0:
 finite difference:
 {}
 elastodiffusion:
-{}""".format(strainmat, D0, Deps, Deps0)
-            self.assertTrue(np.allclose(Deps, Deps0, rtol=2 * eps, atol=2 * eps), msg=failmsg)
+{}""".format(eps * straintype, D0, Dfd, Delastic)
+            self.fail(msg=failmsg)
 
 
 class InternalFrictionTests(unittest.TestCase):
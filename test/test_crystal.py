@@ -17,12 +17,20 @@ class UnitCellTests(unittest.TestCase):
         a = np.array([4. / 3., -2. / 3., 19. / 9.])
         b = np.array([1. / 3., 1. / 3., 1. / 9.])
         self.assertTrue(np.allclose(crystal.incell(a), b))
+        # arrays of vectors, and storing the result:
+        out = np.zeros((2, 3))
+        self.assertIs(crystal.incell(np.array([a, b]), out=out), out)
+        self.assertTrue(np.allclose(out, np.array([b, b])))
 
     def testhalfcell(self):
         """Half cell testing"""
         a = np.array([4. / 3., -2. / 3., 17. / 9.])
         b = np.array([1. / 3., 1. / 3., -1. / 9.])
         self.assertTrue(np.allclose(crystal.inhalf(a), b))
+        # arrays of vectors, and storing the result:
+        out = np.zeros((2, 3))
+        self.assertIs(crystal.inhalf(np.array([a, b]), out=out), out)
+        self.assertTrue(np.allclose(out, np.array([b, b])))
 
 
 class GroupOperationTests(unittest.TestCase):
@@ -65,6 +73,10 @@ class GroupOperationTests(unittest.TestCase):
         rot3 = crystal.GroupOp(np.eye(3, dtype=int), np.zeros(3), np.eye(3), ((1, 2, 0),))
         ident3 = crystal.GroupOp(np.eye(3, dtype=int), np.zeros(3), np.eye(3), ((0, 1, 2),))
         self.assertEqual(rot3 * rot3 * rot3, ident3)
+        # the stored index map arrays are shared (through the products and inverses), so read-only
+        for g in (rot3, rot3 * rot3, rot3.inv()):
+            for atomarray in g.indexmaparray():
+                self.assertFalse(atomarray.flags.writeable)
 
     def testInversion(self):
         """Is the product with the inverse equal to identity?"""
@@ -386,6 +398,24 @@ class CrystalClassTests(unittest.TestCase):
         self.assertEqual(len(crys.basis), 1)  # one chemistry
         self.assertEqual(len(crys.basis[0]), 1)  # one atom in the unit cell
 
+    def testArrayBasis(self):
+        """Can the basis be given as arrays[N,3] instead of lists of array[3]?"""
+        basis = [np.array([0., 0., 0.]), np.array([0.5, 0.5, 0.5])]
+        crys = crystal.Crystal(self.sclatt, np.array(basis))
+        self.isbccMetric(crys)
+        self.assertEqual(len(crys.basis), 1)  # one chemistry
+        self.assertEqual(len(crys.basis[0]), 1)  # one atom in the unit cell
+        NbObasis = [np.array([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]]),
+                    np.array([[0.5, 0, 0], [0, 0.5, 0], [0, 0, 0.5]])]
+        crysarray = crystal.Crystal(self.sclatt, NbObasis)
+        cryslist = crystal.Crystal(self.sclatt, [list(atombasis) for atombasis in NbObasis])
+        self.assertEqual(crysarray.Nchem, 2)
+        for atomarray, atomlist in zip(crysarray.basis, cryslist.basis):
+            self.assertTrue(np.allclose(atomarray, atomlist))
+        self.assertEqual(len(crysarray.G), len(cryslist.G))
+        with self.assertRaises(TypeError):
+            crystal.Crystal(self.sclatt, np.zeros(3))
+
     def testscShift(self):
         """If we start with a supercell, does it get reduced back to our start?"""
         nsuper = np.array([[5, -3, 0], [1, -1, 3], [-2, 1, 1]], dtype=int)
@@ -507,6 +537,78 @@ class CrystalClassTests(unittest.TestCase):
         for g in crys.G:
             self.assertIn(g, crys.pointG[0][0])
 
+    def testsymmetrycache(self):
+        """Does a repeated construction reuse the symmetry analysis, without sharing mutable state?"""
+        crys = crystal.Crystal(self.fcclatt, self.basis)
+        crys2 = crystal.Crystal(self.fcclatt, self.basis, chemistry=['A'])
+        # the (immutable) group and Wyckoff sets come straight from the cache...
+        self.assertIs(crys.G, crys2.G)
+        self.assertIs(crys.Wyckoff, crys2.Wyckoff)
+        # ...while the mutable BZG and pointG are copies
+        self.assertTrue(np.allclose(crys.BZG, crys2.BZG))
+        self.assertEqual(crys.pointG, crys2.pointG)
+        self.assertIsNot(crys.pointG, crys2.pointG)
+        self.assertIsNot(crys.BZG, crys2.BZG)
+        # crystals with spins, or with a different threshold, do not share the analysis
+        for crys3 in (crystal.Crystal(self.fcclatt, self.basis, spins=[1]),
+                      crystal.Crystal(self.fcclatt, self.basis, threshold=1e-6)):
+            self.assertEqual(crys.G, crys3.G)
+            self.assertIsNot(crys.G, crys3.G)
+            self.assertIsNot(crys.Wyckoff, crys3.Wyckoff)
+        crysnosym = crystal.Crystal(self.fcclatt, self.basis, NOSYM=True)
+        self.assertEqual(len(crysnosym.G), 1)
+
+    def testgdirecall(self):
+        """Does applying all of the group operations at once match g_direc?"""
+        crys = crystal.Crystal(self.hexlatt, self.basis)
+        v = np.array([0.1, 0.2, 0.3])
+        gvlist = crys.g_direc_all(v)
+        self.assertEqual(gvlist.shape, (len(crys.G), 3))
+        for g, gv in zip(crys.G, gvlist):
+            self.assertTrue(np.allclose(crys.g_direc(g, v), gv))
+        self.assertTrue(crys.g_direc_equivalent(gvlist[-1], v))
+        self.assertFalse(crys.g_direc_equivalent(2 * v, v))
+
+    def testbasisarrays(self):
+        """Are the stacked basis arrays consistent with the basis?"""
+        crys = crystal.Crystal.HCP(1.).addbasis([np.array([0.5, 0.5, 0.5])])
+        basisarrays = crys.basisarrays()
+        self.assertEqual(len(basisarrays), crys.Nchem)
+        for atomlist, atomarray in zip(crys.basis, basisarrays):
+            self.assertEqual(atomarray.shape, (len(atomlist), 3))
+            for u, v in zip(atomlist, atomarray):
+                self.assertTrue(np.allclose(u, v))
+            with self.assertRaises(ValueError):
+                atomarray[0, 0] = 0.
+        self.assertIs(basisarrays, crys.basisarrays())
+
+    def testWyckoffmap(self):
+        """Does the Wyckoff map send each atom to the Wyckoff set that contains it?"""
+        crys = crystal.Crystal.HCP(1.).addbasis(crystal.Crystal.HCP(1.).Wyckoffpos(np.array([0., 0., 0.5])))
+        Wyckoffmap = crys.Wyckoffmap()
+        self.assertEqual(set(Wyckoffmap.keys()), set(crys.atomindices))
+        for ci, iset in Wyckoffmap.items():
+            self.assertIn(iset, crys.Wyckoff)
+            self.assertIn(ci, iset)
+        self.assertIs(Wyckoffmap, crys.Wyckoffmap())
+
+    def testgposall(self):
+        """Does applying all group operations at once match g_pos for each operation?"""
+        crys = crystal.Crystal.HCP(1.).addbasis([np.array([0.5, 0.5, 0.5])])
+        lattvecs = np.array([[0, 0, 0], [1, -1, 0], [2, 0, 1]])
+        for ind in crys.atomindices:
+            glattlist, gindlist = crys.g_pos_all(lattvecs[1], ind)
+            glattarray, gindarray = crys.g_pos_all(lattvecs, ind)
+            self.assertEqual(glattarray.shape, (len(crys.G), len(lattvecs), 3))
+            for g, glatt, gind, glatts, gind2 in zip(crys.G, glattlist, gindlist, glattarray, gindarray):
+                self.assertEqual(gind, gind2)
+                R, rotind = crys.g_pos(g, lattvecs[1], ind)
+                self.assertEqual(rotind, (ind[0], gind))
+                self.assertTrue(np.all(R == glatt))
+                for lattvec, glattvec in zip(lattvecs, glatts):
+                    R, rotind = crys.g_pos(g, lattvec, ind)
+                    self.assertTrue(np.all(R == glattvec))
+
     def testsquaregroupops(self):
         """Do we have 8 space group operations?"""
         crys = crystal.Crystal(self.squarelatt, self.basis2d)
@@ -787,6 +889,10 @@ class CrystalSpinTests(unittest.TestCase):
         self.assertTrue(np.allclose(np.abs(trans[2]), 0.))
         self.assertEqual(indexmap, ((3, 2, 1, 0),))
 
+        # an empty list of spins should not get in the way
+        crys = crystal.Crystal(np.eye(3), [[np.zeros(3)], []], spins=[[1], []])
+        self.assertEqual(len(crys.G), 48)
+
     def testAddBasis(self):
         """Uranium-Nitride, with addbasis"""
         UNcrys = crystal.Crystal(self.latt, self.basis, ['U', 'N'], self.spins)
@@ -860,6 +966,11 @@ class YAMLTests(unittest.TestCase):
         self.assertEqual(crys.atomindices, crysread.atomindices)
         self.assertEqual(crys.pointG, crysread.pointG)
         self.assertEqual(crys.Wyckoff, crysread.Wyckoff)
+        # cached derived arrays are not written out, and are rebuilt (read-only) after reading
+        for attr in crystal.Crystal.__cacheattr__:
+            self.assertNotIn(attr, cryswrite)
+        for atomarray in crysread.basisarrays():
+            self.assertFalse(atomarray.flags.writeable)
 
     def testCrystalYAMLsimplified(self):
         """Test that we can read a simplified crystal input"""
@@ -952,6 +1063,23 @@ class KPTgentest(unittest.TestCase):
             self.assertTrue(self.crys.inBZ(q),
                             msg="Failed with vector {} not in BZ".format(q))
 
+    def testKPT_largeFCCmesh(self):
+        """Do large FCC meshes (with points on the zone edges and corners) fold into the BZ?"""
+        crys = crystal.Crystal.FCC(1.)
+        for N in (36, 46, 62):
+            kpts = crys.fullkptmesh((N, N, N))
+            self.assertEqual(kpts.shape, (N ** 3, 3))
+            self.assertTrue(np.all(np.dot(kpts, crys.BZG.T) <= crys.BZG2() + crys.threshold),
+                            msg="Failed with {}x{}x{} mesh".format(N, N, N))
+        # a single pass is not enough for these meshes: we should be warned, not handed unfolded points
+        maxpasses = crystal._FOLDBZ_MAXPASSES
+        try:
+            crystal._FOLDBZ_MAXPASSES = 1
+            with self.assertWarns(RuntimeWarning):
+                crys.fullkptmesh((36, 36, 36))
+        finally:
+            crystal._FOLDBZ_MAXPASSES = maxpasses
+
     def testKPT_IRZ(self):
         """Do we produce a correct irreducible wedge?"""
         Nkpt = np.prod(self.N)
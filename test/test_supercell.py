@@ -72,6 +72,47 @@ class FCCSuperTests(unittest.TestCase):
             size, invsup, tlist, tdict = supercell.Supercell.maketrans(randsuper)
             self.assertTrue(len(tlist) == size)
 
+    def testTransCache(self):
+        """Are repeated translation generations consistent, and independent of each other?"""
+        sup = np.array([[-1, 1, 1], [1, -1, 1], [1, 1, -1]])
+        size0, invsup0, tlist0, tdict0 = supercell.Supercell.maketrans(sup)
+        size1, invsup1, tlist1, tdict1 = supercell.Supercell.maketrans(sup.copy())
+        self.assertEqual(size0, size1)
+        self.assertTrue(np.all(invsup0 == invsup1))
+        self.assertEqual(len(tlist0), len(tlist1))
+        for tv0, tv1 in zip(tlist0, tlist1):
+            self.assertTrue(np.all(tv0 == tv1))
+        self.assertEqual(tdict0, tdict1)
+        # modifying what we got back should not change the next call; translations are read-only
+        invsup0[0, 0] += 1
+        with self.assertRaises(ValueError):
+            tlist0[0, 0] += 1
+        tdict0.clear()
+        size2, invsup2, tlist2, tdict2 = supercell.Supercell.maketrans(sup)
+        self.assertTrue(np.all(invsup2 == invsup1))
+        self.assertEqual(len(tlist2), size2)
+        self.assertEqual(tdict2, tdict1)
+
+    def testTransIndex(self):
+        """Does the translation index lookup match transdict?"""
+        for sup in self.groupsupers:
+            super0 = supercell.Supercell(self.crys, sup)
+            for n, tv in enumerate(super0.translist):
+                self.assertEqual(super0.transindex(tv), n)
+                self.assertEqual(super0.transdict[tuple(tv)], n)
+                # should also work for translations that are not reduced mod size:
+                self.assertEqual(super0.transindex(tv - super0.size * np.array([1, 0, -2])), n)
+            tarray = np.array(super0.translist)
+            self.assertTrue(np.all(super0.transindex(tarray[::-1]) == np.arange(super0.size)[::-1]))
+        # translations that are not in the supercell should fail, just as transdict does
+        super0 = supercell.Supercell(crystal.Crystal.FCC(1.), np.array([[2, 0, 0], [0, 2, 0], [0, 0, 1]]))
+        for tv in ([1, 0, 0], [super0.size - 1] * 3):
+            self.assertNotIn(tuple(np.array(tv) % super0.size), super0.transdict)
+            with self.assertRaises(KeyError):
+                super0.transindex(tv)
+            with self.assertRaises(KeyError):
+                super0.transindex(np.array([super0.translist[0], tv]))
+
     def testSites(self):
         """Do we have the correct sites in our supercell?"""
         for n in range(100):
@@ -91,6 +132,17 @@ class FCCSuperTests(unittest.TestCase):
             for v in Rdictset.values():
                 self.assertEqual(len(v), sup.size)
 
+    def testSitesFloat32(self):
+        """Do single precision positions match the double precision sites?"""
+        for sup in self.groupsupers:
+            super64 = supercell.Supercell(self.crys, sup)
+            super32 = supercell.Supercell(self.crys, sup, dtype=np.float32)
+            self.assertEqual(super32.pos.dtype, np.float32)
+            self.assertTrue(np.allclose(super32.pos, super64.pos, atol=1e-6))
+            self.assertEqual(len(super32.G), len(super64.G))
+            for ind, u in enumerate(super64.pos):
+                self.assertEqual(super32.index(u), ind)
+
     def testGroupOps(self):
         """Do we correctly generate group operations inside the supercell?"""
         for nmat in self.groupsupers:
@@ -355,3 +407,10 @@ class InterstitialSuperTests(HCPSuperTests):
         superYAML = crystal.yaml.load(YAMLstring)
         self.assertOrderingSuperEqual(sup, superYAML, msg='YAML write/read fail?')
         # print(YAMLstring)
+        # supercells written before the translation keys (and invsuperfrac) were stored need to rebuild them
+        for attr in ('transcode', 'transorder', 'transkeys', 'invsuperfrac'): delattr(sup, attr)
+        superYAML = crystal.yaml.load(crystal.yaml.dump(sup))
+        supcopy = superYAML.copy()
+        self.assertEqual(superYAML, supcopy)
+        g = next(iter(superYAML.G))
+        self.assertEqual(g * superYAML, g * supcopy)